@@ -0,0 +1 @@
+"""Núcleo de processamento compartilhado pelas telas de conciliação."""
@@ -0,0 +1,205 @@
+import io
+import os
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+
+# ==========================================
+# PROCESSADOR DE PLANILHA DE BENS MÓVEIS
+# ==========================================
+CONTAS_EXCLUIDAS = [123110703, 123110402, 123119910]
+CONTA_ESTOQUE_INTERNO = 123110801
+CONTA_DESTAQUE_AZUL = 123119905
+
+# O paralelismo é decidido pelo volume de dados, medido pelo tamanho descompactado das abas
+# (xl/worksheets/*.xml), que se lê do índice do .xlsx sem abrir a planilha. Medições num
+# servidor de referência: o caminho sequencial custa ~0,5 µs por byte (20 abas x 30 linhas =
+# 0,1 MB em 0,15 s; 120 abas x 300 linhas = 5,9 MB em 3,2 s), e cada chamada ao pool já
+# aquecido acrescenta ~0,1 s fixo mais ~30% do tempo sequencial (cada processo reabre a
+# planilha e devolve os DataFrames serializados). Abaixo de ~2 MB (~1 s sequencial) o ganho
+# não compensa, e a planilha típica de uma UG fica bem abaixo disso.
+MINIMO_BYTES_PARALELO = 2_000_000
+
+# Processos do pool, compartilhado por todas as sessões do servidor: é o teto de processos
+# extras que esta tela pode criar, não importa quantas sessões processem ao mesmo tempo
+PROCESSOS_PLANILHA = int(os.environ.get("CONCILIACAO_PROCESSOS_PLANILHA", min(4, os.cpu_count() or 1)))
+
+
+# --- FUNÇÃO AUXILIAR DE FORMATAÇÃO ---
+def formatar_aba(writer, sheet_name, data_rows, header_rows):
+    # Escreve Cabeçalho (Deslocado 1 coluna para direita)
+    header_rows.to_excel(writer, sheet_name=sheet_name, startrow=0, startcol=1, index=False, header=False)
+
+    # Escreve Dados (Começando na coluna A, linha 8)
+    data_rows.to_excel(writer, sheet_name=sheet_name, startrow=7, startcol=0, index=False, header=False)
+
+    worksheet = writer.sheets[sheet_name]
+    workbook = writer.book
+
+    # --- DEFINIÇÃO DE FORMATOS (Recriados para cada workbook) ---
+    fmt_currency = workbook.add_format({'num_format': '#,##0.00'})
+    fmt_total_label = workbook.add_format({'bold': True, 'align': 'right'})
+    fmt_total_value = workbook.add_format({'bold': True, 'num_format': '#,##0.00', 'top': 1})
+    fmt_red = workbook.add_format({'bg_color': '#FF0000', 'font_color': '#FFFFFF'})
+    fmt_blue = workbook.add_format({'bg_color': '#0000FF', 'font_color': '#FFFFFF'})
+
+    # Largura das colunas
+    worksheet.set_column('A:A', 40) # Nova Descrição
+    worksheet.set_column('B:C', 15)
+    worksheet.set_column('D:D', 18, fmt_currency)
+
+    num_rows = len(data_rows)
+    start_row_excel = 7 # Linha 8
+
+    # Loop para pintar as linhas
+    for i in range(num_rows):
+        val_conta = data_rows.iloc[i, 1] # Coluna B
+        val_valor = data_rows.iloc[i, 3] # Coluna D
+
+        try: val_valor = float(val_valor)
+        except: val_valor = 0
+
+        row_idx = start_row_excel + i
+
+        if val_conta == CONTA_ESTOQUE_INTERNO and val_valor != 0:
+            worksheet.write(row_idx, 1, val_conta, fmt_red)
+            worksheet.write(row_idx, 2, data_rows.iloc[i, 2], fmt_red)
+            worksheet.write(row_idx, 3, val_valor, fmt_red)
+
+        elif val_conta == CONTA_DESTAQUE_AZUL and val_valor != 0:
+            worksheet.write(row_idx, 1, val_conta, fmt_blue)
+            worksheet.write(row_idx, 2, data_rows.iloc[i, 2], fmt_blue)
+            worksheet.write(row_idx, 3, val_valor, fmt_blue)
+
+    # Total
+    total_row = start_row_excel + num_rows
+    soma_total = pd.to_numeric(data_rows.iloc[:, 3], errors='coerce').sum()
+    worksheet.write(total_row, 2, "TOTAL", fmt_total_label)
+    worksheet.write(total_row, 3, soma_total, fmt_total_value)
+
+# --- PROCESSAMENTO DAS ABAS ---
+def processar_aba(df_raw, indice_descricoes):
+    """
+    Aplica filtro, PROCV e ordenação em uma aba. Devolve (cabeçalho, dados) ou None se a aba não tiver dados.
+    Função pura: depende só dos argumentos, para poder rodar em qualquer processo do pool.
+    """
+    if len(df_raw) < 8: return None
+
+    header_rows = df_raw.iloc[:7]
+    data_rows = df_raw.iloc[7:].copy()
+
+    data_rows[0] = pd.to_numeric(data_rows[0], errors='coerce')
+
+    # Filtro
+    data_rows = data_rows[~data_rows[0].isin(CONTAS_EXCLUIDAS)]
+
+    # PROCV (junção vetorizada com o índice da MATRIZ)
+    data_rows['Nova_Descricao'] = data_rows[0].map(indice_descricoes)
+
+    # Reordenar colunas
+    cols = list(data_rows.columns)
+    if 'Nova_Descricao' in cols:
+        cols.insert(0, cols.pop(cols.index('Nova_Descricao')))
+    data_rows = data_rows[cols]
+
+    # Ordenar linhas (estável: empates mantêm a ordem da aba, igual em qualquer processo)
+    data_rows = data_rows.sort_values(by='Nova_Descricao', ascending=True, kind='stable')
+    return header_rows, data_rows
+
+def _processar_lote(conteudo, nomes_abas, indice_descricoes):
+    """Lê e processa um bloco contíguo de abas. Executado dentro dos processos do pool."""
+    xls_file = pd.ExcelFile(io.BytesIO(conteudo))
+    processed_sheets = []
+
+    for sheet_name in nomes_abas:
+        df_raw = pd.read_excel(xls_file, sheet_name=sheet_name, header=None)
+        processada = processar_aba(df_raw, indice_descricoes)
+        if processada is None: continue
+
+        header_rows, data_rows = processada
+        processed_sheets.append({
+            'name': sheet_name,
+            'header': header_rows,
+            'data': data_rows
+        })
+    return processed_sheets
+
+_pool = None
+_trava_pool = threading.Lock()
+
+def _obter_pool():
+    """Pool de processos do servidor, criado no primeiro uso e reaproveitado entre cliques e sessões."""
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            # 'spawn' evita herdar as threads do servidor do Streamlit no fork
+            _pool = ProcessPoolExecutor(max_workers=PROCESSOS_PLANILHA, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def _descartar_pool(pool):
+    global _pool
+    with _trava_pool:
+        if _pool is pool: _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def volume_dados(conteudo):
+    """Tamanho descompactado das abas do .xlsx, lido só do índice do arquivo."""
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+        return sum(i.file_size for i in pacote.infolist() if i.filename.startswith('xl/worksheets/'))
+
+def processar_planilha(arquivo, indice_descricoes, processos=None):
+    """
+    Processa todas as abas da planilha principal (exceto MATRIZ), devolvendo-as na ordem original.
+    Planilhas com muitos dados (MINIMO_BYTES_PARALELO) são divididas em blocos contíguos de abas,
+    tratados em paralelo pelo pool de processos do servidor; as demais são processadas aqui mesmo.
+    """
+    arquivo.seek(0)
+    conteudo = arquivo.read()
+    nomes_abas = [n for n in pd.ExcelFile(io.BytesIO(conteudo)).sheet_names if n != "MATRIZ"]
+
+    processos = min(processos or PROCESSOS_PLANILHA, len(nomes_abas))
+    if processos <= 1 or volume_dados(conteudo) < MINIMO_BYTES_PARALELO:
+        return _processar_lote(conteudo, nomes_abas, indice_descricoes)
+
+    # Um bloco por processo: cada um reabre a planilha e lê apenas as suas abas
+    tamanho = -(-len(nomes_abas) // processos)
+    blocos = [nomes_abas[i:i + tamanho] for i in range(0, len(nomes_abas), tamanho)]
+
+    pool = _obter_pool()
+    try:
+        lotes = pool.map(_processar_lote, [conteudo] * len(blocos), blocos, [indice_descricoes] * len(blocos))
+        return [item for lote in lotes for item in lote]
+    except BrokenProcessPool:
+        # Um processo do pool morreu: descarta o pool (o próximo uso cria outro) e segue sem paralelismo
+        _descartar_pool(pool)
+        return _processar_lote(conteudo, nomes_abas, indice_descricoes)
+
+# --- GERAÇÃO DOS ARQUIVOS ---
+def gerar_planilha_unificada(df_matriz, processed_sheets):
+    output_combined = io.BytesIO()
+    with pd.ExcelWriter(output_combined, engine='xlsxwriter') as writer:
+        # Opcional: Incluir a Matriz para conferência
+        df_matriz.to_excel(writer, sheet_name='MATRIZ', index=False, header=False)
+
+        for item in processed_sheets:
+            formatar_aba(writer, item['name'], item['data'], item['header'])
+
+    output_combined.seek(0)
+    return output_combined
+
+def gerar_zip_abas(processed_sheets):
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for item in processed_sheets:
+            single_excel_buffer = io.BytesIO()
+            with pd.ExcelWriter(single_excel_buffer, engine='xlsxwriter') as single_writer:
+                formatar_aba(single_writer, item['name'], item['data'], item['header'])
+
+            single_excel_buffer.seek(0)
+            zf.writestr(f"{item['name']}.xlsx", single_excel_buffer.getvalue())
+
+    zip_buffer.seek(0)
+    return zip_buffer
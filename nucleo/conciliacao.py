@@ -0,0 +1,211 @@
+import re
+import os
+import hashlib
+import pandas as pd
+from nucleo.erros import ErroConciliacao
+from nucleo.governador import execucao, formatar_espera
+from nucleo.matriz import CAMINHO_MATRIZ, carregar_matriz
+from nucleo.siafi import ler_siafi_ug, linhas_conciliaveis
+from nucleo.valores import TOLERANCIA_CENTAVOS
+
+# ==========================================
+# PIPELINE DE CONCILIAÇÃO RMB x SIAFI
+# ==========================================
+# As etapas pesadas (leitura de PDF/OCR, relatório e histórico) importam seus módulos
+# somente quando executadas.
+
+# ==========================================
+# ETAPAS DO PIPELINE
+# ==========================================
+def parear_arquivos(xls_file, pdfs):
+    """Associa cada aba da planilha (pelo número da UG) ao PDF cujo nome começa com o mesmo número."""
+    pares = []
+    avisos_usuario = []
+    try:
+        for sheet_name in xls_file.sheet_names:
+            if sheet_name.upper() == "MATRIZ": continue
+
+            # Identifica o número da Unidade Gestora pelo nome da aba
+            match = re.search(r'^(\d+)', sheet_name)
+            if match:
+                ug = match.group(1)
+                pdf_match = next((f for n, f in pdfs.items() if n.startswith(ug)), None)
+                if pdf_match:
+                    pares.append({'ug': ug, 'sheet_name': sheet_name, 'pdf': pdf_match})
+                else:
+                    avisos_usuario.append(f"Falta PDF: A Unidade Gestora {ug} está na planilha, mas o PDF correspondente não foi enviado.")
+    except Exception as e:
+        raise ErroConciliacao("❌ Não foi possível ler a Planilha SIAFI. Certifique-se de que o arquivo não está corrompido.") from e
+    return pares, avisos_usuario
+
+def extrair_ug(par, xls_file, dict_matriz, avisos_usuario):
+    """Executa a leitura do SIAFI e do RMB de uma Unidade Gestora, sem cruzar os dados."""
+    ug = par['ug']
+
+    # --- LEITURA DO EXCEL ---
+    saldo_estoque = 0
+    linhas_siafi = pd.DataFrame(columns=['Conta', 'Descricao', 'Valor', 'Chave_Vinculo'])
+    try:
+        saldo_estoque, linhas_siafi = ler_siafi_ug(xls_file, par['sheet_name'], dict_matriz)
+    except Exception as e:
+        avisos_usuario.append(f"Erro ao processar os dados da planilha para a UG {ug}.")
+
+    # --- LEITURA DO PDF ---
+    linhas_rmb = pd.DataFrame(columns=['Pagina', 'Chave_Vinculo', 'Saldo_PDF'])
+    hash_pdf = None
+    try:
+        par['pdf'].seek(0)
+        pdf_bytes = par['pdf'].read()
+        hash_pdf = hashlib.sha256(pdf_bytes).hexdigest()
+        from nucleo.rmb import ler_pdf_rmb
+        linhas_rmb = ler_pdf_rmb(pdf_bytes, hash_pdf)
+    except Exception as e:
+        avisos_usuario.append(f"Erro ao ler o documento PDF da UG {ug}.")
+
+    return {
+        'ug': ug,
+        'saldo_estoque': int(saldo_estoque),
+        'tem_estoque_com_saldo': int(saldo_estoque) != 0,
+        'hash_pdf': hash_pdf,
+        'linhas_siafi': linhas_siafi,
+        'linhas_rmb': linhas_rmb,
+    }
+
+def _empilhar(frames, colunas):
+    """Concatena as linhas de todos os pares (já com a coluna 'par'), ignorando as vazias."""
+    frames = [f for f in frames if not f.empty]
+    if not frames: return pd.DataFrame(columns=colunas)
+    return pd.concat(frames, ignore_index=True)[colunas]
+
+def cruzar_lote(extracoes):
+    """
+    Cruza os saldos do RMB com os do SIAFI de todas as UGs num único agrupamento por
+    (par, Chave_Vinculo) e num único merge, em vez de um merge por UG. A chave é a posição da
+    extração, não o número da UG: duas abas com o mesmo prefixo de UG seguem como seções
+    independentes. Completa cada extração com o cruzamento final, as divergências e os totais
+    da sua seção (tudo em centavos).
+    """
+    siafi = linhas_conciliaveis(_empilhar(
+        [e['linhas_siafi'].assign(par=i) for i, e in enumerate(extracoes)],
+        ['par', 'Conta', 'Chave_Vinculo', 'Valor', 'Descricao'],
+    ))
+    rmb = _empilhar(
+        [e['linhas_rmb'].assign(par=i) for i, e in enumerate(extracoes)],
+        ['par', 'Chave_Vinculo', 'Saldo_PDF'],
+    )
+
+    df_padrao = siafi.groupby(['par', 'Chave_Vinculo'], as_index=False).agg(
+        Saldo_Excel=('Valor', 'sum'), Descricao_Completa=('Descricao', 'first'),
+    )
+    df_pdf_final = rmb.groupby(['par', 'Chave_Vinculo'], as_index=False)['Saldo_PDF'].sum()
+
+    final = pd.merge(df_pdf_final, df_padrao, on=['par', 'Chave_Vinculo'], how='outer').fillna(0)
+    final = final.astype({'Chave_Vinculo': 'int64', 'Saldo_PDF': 'int64', 'Saldo_Excel': 'int64'})
+    sem_descricao = final['Descricao_Completa'].astype(str).str.strip() == '0'
+    final['Descricao'] = final['Descricao_Completa'].where(~sem_descricao, "ITEM SEM DESCRIÇÃO NO SIAFI")
+    final['Diferenca'] = final['Saldo_PDF'] - final['Saldo_Excel']
+
+    totais = final.groupby('par')[['Saldo_PDF', 'Saldo_Excel']].sum()
+    divergencias = final.loc[final['Diferenca'].abs() > TOLERANCIA_CENTAVOS]
+    colunas_final = ['Chave_Vinculo', 'Saldo_PDF', 'Saldo_Excel', 'Descricao_Completa', 'Descricao', 'Diferenca']
+    colunas_divergencias = ['Chave_Vinculo', 'Descricao', 'Saldo_PDF', 'Saldo_Excel', 'Diferenca']
+    final_por_par = dict(tuple(final[['par'] + colunas_final].groupby('par', sort=False)))
+    divergencias_por_par = dict(tuple(divergencias[['par'] + colunas_divergencias].groupby('par', sort=False)))
+    vazio = final.iloc[0:0]
+
+    resultados = []
+    for par, extracao in enumerate(extracoes):
+        soma_pdf = int(totais['Saldo_PDF'].get(par, 0))
+        soma_excel = int(totais['Saldo_Excel'].get(par, 0))
+        resultados.append({
+            **extracao,
+            'final': final_por_par.get(par, vazio)[colunas_final].reset_index(drop=True),
+            'divergencias': divergencias_por_par.get(par, vazio)[colunas_divergencias].reset_index(drop=True),
+            'soma_pdf': soma_pdf,
+            'soma_excel': soma_excel,
+            'dif_total': soma_pdf - soma_excel,
+        })
+    return resultados
+
+# ==========================================
+# PIPELINE COMPLETO
+# ==========================================
+def hash_arquivo(arquivo):
+    """SHA-256 de um arquivo enviado (objeto com seek()/read()) ou de um caminho em disco."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f: return hashlib.sha256(f.read()).hexdigest()
+    arquivo.seek(0)
+    digest = hashlib.sha256(arquivo.read()).hexdigest()
+    arquivo.seek(0)
+    return digest
+
+def executar_conciliacao(arquivo_siafi, pdfs, caminho_matriz=CAMINHO_MATRIZ, ao_progredir=None, periodo=None, sessao=None):
+    """
+    Executa a conciliação completa, sem depender da interface.
+    `pdfs` mapeia nome do arquivo -> objeto com seek()/read(). `ao_progredir(fracao, mensagem)`
+    é chamado a cada etapa, tanto pela tela do Streamlit quanto pelo worker da fila de jobs.
+    Com `periodo` (AAAA-MM), as linhas extraídas e o cruzamento de cada UG vão para o histórico.
+    A execução espera uma vaga no governador do servidor; `sessao` identifica quem pediu,
+    para o rodízio entre sessões. Devolve os resultados por UG, os avisos e o relatório PDF já renderizado.
+    """
+    def progredir(fracao, mensagem):
+        if ao_progredir: ao_progredir(fracao, mensagem)
+
+    def aguardar(posicao, espera):
+        mensagem = f"Servidor ocupado: sua conciliação é a {posicao}ª da fila"
+        if espera is not None: mensagem += f" (espera estimada: {formatar_espera(espera)})"
+        progredir(0.0, mensagem + "...")
+
+    with execucao(sessao, ao_aguardar=aguardar):
+        return _conciliar(arquivo_siafi, pdfs, caminho_matriz, progredir, periodo)
+
+def _conciliar(arquivo_siafi, pdfs, caminho_matriz, progredir, periodo):
+    progredir(0.0, "Preparando ambiente de conciliação...")
+    dict_matriz = carregar_matriz(caminho_matriz)
+
+    try:
+        xls_file = pd.ExcelFile(arquivo_siafi)
+    except Exception as e:
+        raise ErroConciliacao("❌ Não foi possível ler a Planilha SIAFI. Certifique-se de que o arquivo não está corrompido.") from e
+    pares, avisos_usuario = parear_arquivos(xls_file, pdfs)
+
+    if not pares:
+        raise ErroConciliacao("❌ Não foi possível encontrar pares correspondentes (Aba do Excel + PDF com o mesmo número de UG). Verifique o nome dos arquivos.")
+
+    extracoes = []
+    for idx, par in enumerate(pares):
+        progredir(idx / len(pares), f"Analisando dados da Unidade Gestora: {par['ug']}...")
+        extracoes.append(extrair_ug(par, xls_file, dict_matriz, avisos_usuario))
+
+    # Um único cruzamento para todas as UGs; o relatório segue seção a seção, na ordem dos pares
+    progredir(1.0, "Cruzando os saldos de todas as Unidades Gestoras...")
+    resultados = cruzar_lote(extracoes)
+
+    from nucleo.relatorio import PDF_Report, escrever_secao_ug
+    pdf_out = PDF_Report()
+    pdf_out.add_page()
+    for resultado in resultados:
+        escrever_secao_ug(pdf_out, resultado)
+
+    if periodo:
+        progredir(1.0, "Registrando a conciliação no histórico...")
+        try:
+            from nucleo import historico
+            historico.registrar_execucao(resultados, periodo, hash_arquivo(arquivo_siafi))
+        except Exception as e:
+            avisos_usuario.append("Não foi possível registrar esta conciliação no histórico.")
+
+    # As linhas brutas só interessam ao histórico; o restante do resultado segue para a tela
+    for resultado in resultados:
+        del resultado['linhas_siafi'], resultado['linhas_rmb']
+
+    progredir(1.0, "Concluído! O relatório final está pronto para download.")
+
+    # Sem relatório (None) a interface informa a falha na geração do arquivo
+    relatorio_pdf = None
+    try:
+        relatorio_pdf = bytes(pdf_out.output())
+    except Exception as e:
+        pass
+
+    return {'resultados': resultados, 'avisos': avisos_usuario, 'relatorio_pdf': relatorio_pdf}
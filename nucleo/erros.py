@@ -0,0 +1,2 @@
+class ErroConciliacao(Exception):
+    """Erro que impede a conciliação. A mensagem é exibida diretamente ao usuário."""
@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# ==========================================
+# GOVERNADOR DE CONCORRÊNCIA DO SERVIDOR
+# ==========================================
+# Todas as sessões do Streamlit rodam no mesmo processo, então estes limites valem para o
+# servidor inteiro (no worker da fila de jobs, valem para cada processo do worker):
+#   CONCILIACAO_MAX_EXECUCOES    -> conciliações rodando ao mesmo tempo
+#   CONCILIACAO_MAX_PAGINAS_OCR  -> páginas em OCR (rasterização + pré-processamento + Tesseract) ao mesmo tempo
+# As vagas são distribuídas em rodízio entre as sessões que estão esperando: uma sessão com
+# muitos pedidos na fila não passa na frente das outras.
+MAX_EXECUCOES = int(os.environ.get("CONCILIACAO_MAX_EXECUCOES", max(1, (os.cpu_count() or 1) // 2)))
+MAX_PAGINAS_OCR = int(os.environ.get("CONCILIACAO_MAX_PAGINAS_OCR", os.cpu_count() or 1))
+
+# Quantas execuções recentes entram na média usada para estimar a espera
+AMOSTRAS_DURACAO = 20
+
+# Sessão dona da execução em andamento na thread atual; as páginas de OCR herdam dela
+_sessao_atual = contextvars.ContextVar('sessao_conciliacao', default=None)
+
+
+class FilaJusta:
+    """Semáforo com fila por sessão: libera as vagas em rodízio entre as sessões em espera."""
+
+    def __init__(self, limite):
+        self.limite = max(1, limite)
+        self._ocupadas = 0
+        self._filas = OrderedDict()
+        self._cond = threading.Condition()
+        self._duracoes = deque(maxlen=AMOSTRAS_DURACAO)
+
+    def _ordem(self):
+        """Ordem de atendimento prevista: o primeiro pedido de cada sessão, depois o segundo, e assim por diante."""
+        filas = [list(f) for f in self._filas.values()]
+        ordem = []
+        for i in range(max(map(len, filas), default=0)):
+            ordem.extend(f[i] for f in filas if i < len(f))
+        return ordem
+
+    def _pode_entrar(self, pedido):
+        return self._ocupadas < self.limite and self._ordem()[0] is pedido
+
+    def _retirar(self, sessao, pedido):
+        fila = self._filas[sessao]
+        fila.remove(pedido)
+        del self._filas[sessao]
+        # A sessão atendida vai para o fim do rodízio (ou sai dele, se não tem mais pedidos)
+        if fila: self._filas[sessao] = fila
+
+    def espera_estimada(self, posicao):
+        """Segundos estimados até a vaga, pela duração média das últimas execuções (None sem histórico)."""
+        if not self._duracoes: return None
+        media = sum(self._duracoes) / len(self._duracoes)
+        rodadas = -(-posicao // self.limite)
+        return rodadas * media
+
+    @contextmanager
+    def vaga(self, sessao, ao_aguardar=None, intervalo=1.0):
+        """
+        Bloqueia até haver vaga para a sessão. Enquanto espera, chama `ao_aguardar(posicao, espera)`
+        a cada `intervalo` segundos com a posição na fila e a espera estimada em segundos.
+        """
+        pedido = object()
+        with self._cond:
+            self._filas.setdefault(sessao, deque()).append(pedido)
+        try:
+            while True:
+                with self._cond:
+                    if self._pode_entrar(pedido):
+                        self._retirar(sessao, pedido)
+                        self._ocupadas += 1
+                        # Com mais de uma vaga livre, o próximo da fila também pode entrar
+                        self._cond.notify_all()
+                        break
+                    posicao = self._ordem().index(pedido) + 1
+                    espera = self.espera_estimada(posicao)
+                # A tela é atualizada fora da trava, para não segurar as outras sessões
+                if ao_aguardar: ao_aguardar(posicao, espera)
+                with self._cond:
+                    if not self._pode_entrar(pedido): self._cond.wait(intervalo)
+        except BaseException:
+            # Sessão encerrada ou recarregada durante a espera: libera o lugar na fila
+            with self._cond:
+                if pedido in self._filas.get(sessao, ()): self._retirar(sessao, pedido)
+                self._cond.notify_all()
+            raise
+
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._ocupadas -= 1
+                self._duracoes.append(time.monotonic() - inicio)
+                self._cond.notify_all()
+
+
+_execucoes = FilaJusta(MAX_EXECUCOES)
+_paginas_ocr = FilaJusta(MAX_PAGINAS_OCR)
+
+@contextmanager
+def execucao(sessao=None, ao_aguardar=None):
+    """Vaga para uma conciliação inteira. As páginas de OCR dentro dela contam para a mesma sessão."""
+    with _execucoes.vaga(sessao, ao_aguardar):
+        token = _sessao_atual.set(sessao)
+        try:
+            yield
+        finally:
+            _sessao_atual.reset(token)
+
+def pagina_ocr():
+    """Vaga para o OCR de uma página, disputada em rodízio com as páginas das outras sessões."""
+    return _paginas_ocr.vaga(_sessao_atual.get())
+
+def formatar_espera(segundos):
+    if segundos < 60: return "menos de 1 min"
+    return f"~{round(segundos / 60)} min"
@@ -0,0 +1,169 @@
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from nucleo.valores import TOLERANCIA_CENTAVOS
+
+# ==========================================
+# HISTÓRICO COLUNAR DAS CONCILIAÇÕES
+# ==========================================
+# Cada execução acrescenta arquivos Parquet em três datasets particionados por período e UG:
+#   <DIR_HISTORICO>/siafi/periodo=AAAA-MM/ug=NNNNNN/...      -> linhas extraídas da planilha SIAFI
+#   <DIR_HISTORICO>/rmb/periodo=AAAA-MM/ug=NNNNNN/...        -> linhas extraídas do relatório RMB
+#   <DIR_HISTORICO>/resultados/periodo=AAAA-MM/ug=NNNNNN/... -> cruzamento final por Chave_Vinculo
+# As consultas leem apenas as partições e colunas pedidas. Valores monetários são gravados em
+# centavos (int64), como o pipeline os calcula; a conversão para reais fica com a tela.
+DIR_HISTORICO = os.environ.get("CONCILIACAO_DIR_HISTORICO", "dados_historico")
+
+PARTICIONAMENTO = ds.partitioning(pa.schema([('periodo', pa.string()), ('ug', pa.string())]), flavor='hive')
+
+_COLUNAS_EXECUCAO = [
+    ('execucao_id', pa.string()),
+    # Resolução de microssegundos: execuções seguidas não empatam no horário
+    ('registrado_em', pa.timestamp('us')),
+]
+
+ESQUEMAS = {
+    'siafi': pa.schema(_COLUNAS_EXECUCAO + [
+        ('hash_planilha', pa.string()),
+        ('Conta', pa.string()),
+        ('Descricao', pa.string()),
+        ('Valor', pa.int64()),
+        ('Chave_Vinculo', pa.int64()),
+    ]),
+    'rmb': pa.schema(_COLUNAS_EXECUCAO + [
+        ('hash_pdf', pa.string()),
+        ('Pagina', pa.int64()),
+        ('Chave_Vinculo', pa.int64()),
+        ('Saldo_PDF', pa.int64()),
+    ]),
+    'resultados': pa.schema(_COLUNAS_EXECUCAO + [
+        ('hash_planilha', pa.string()),
+        ('hash_pdf', pa.string()),
+        ('Chave_Vinculo', pa.int64()),
+        ('Descricao', pa.string()),
+        ('Saldo_PDF', pa.int64()),
+        ('Saldo_Excel', pa.int64()),
+        ('Diferenca', pa.int64()),
+    ]),
+}
+
+
+def _esquema_completo(tabela):
+    return ESQUEMAS[tabela].append(pa.field('periodo', pa.string())).append(pa.field('ug', pa.string()))
+
+def _gravar(tabela, df, execucao_id):
+    esquema = _esquema_completo(tabela)
+    dados = pa.Table.from_pandas(df[esquema.names], schema=esquema, preserve_index=False)
+    ds.write_dataset(
+        dados,
+        os.path.join(DIR_HISTORICO, tabela),
+        format='parquet',
+        partitioning=PARTICIONAMENTO,
+        basename_template=f"{execucao_id}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+def registrar_execucao(resultados, periodo, hash_planilha):
+    """
+    Acrescenta ao histórico as linhas SIAFI, RMB e o cruzamento final de cada UG da execução.
+    Devolve o id gerado para a execução.
+    """
+    execucao_id = uuid.uuid4().hex
+    registrado_em = pd.Timestamp.now()
+    lotes = {'siafi': [], 'rmb': [], 'resultados': []}
+
+    for resultado in resultados:
+        comuns = {
+            'execucao_id': execucao_id, 'registrado_em': registrado_em,
+            'periodo': periodo, 'ug': resultado['ug'],
+            'hash_planilha': hash_planilha, 'hash_pdf': resultado['hash_pdf'],
+        }
+        lotes['siafi'].append(resultado['linhas_siafi'].assign(**comuns))
+        lotes['rmb'].append(resultado['linhas_rmb'].assign(**comuns))
+        lotes['resultados'].append(resultado['final'].assign(**comuns))
+
+    for tabela, frames in lotes.items():
+        frames = [f for f in frames if not f.empty]
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+            if 'Chave_Vinculo' in df.columns:
+                df['Chave_Vinculo'] = df['Chave_Vinculo'].astype('Int64')
+            _gravar(tabela, df, execucao_id)
+    return execucao_id
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+def consultar(tabela, colunas=None, periodos=None, ugs=None, chaves=None):
+    """
+    Lê um dos datasets ('siafi', 'rmb' ou 'resultados') como DataFrame.
+    Os filtros por período e UG descartam partições inteiras sem abri-las; `colunas` limita
+    as colunas lidas dos arquivos Parquet.
+    """
+    caminho = os.path.join(DIR_HISTORICO, tabela)
+    if not os.path.isdir(caminho):
+        return pd.DataFrame(columns=colunas or ESQUEMAS[tabela].names + ['periodo', 'ug'])
+
+    dataset = ds.dataset(caminho, format='parquet', partitioning=PARTICIONAMENTO)
+    filtro = None
+    for campo, valores in (('periodo', periodos), ('ug', ugs), ('Chave_Vinculo', chaves)):
+        if valores:
+            expr = ds.field(campo).isin(list(valores))
+            filtro = expr if filtro is None else filtro & expr
+    return dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+
+def listar_periodos():
+    caminho = os.path.join(DIR_HISTORICO, 'resultados')
+    if not os.path.isdir(caminho): return []
+    return sorted(n.split('=', 1)[1] for n in os.listdir(caminho) if n.startswith('periodo='))
+
+def _ultima_execucao(df):
+    """
+    Mantém apenas a execução mais recente de cada (período, UG) — reprocessamentos substituem os anteriores.
+    Escolhe um único execucao_id por (período, UG); empates de horário são desfeitos pelo id.
+    """
+    if df.empty: return df
+    execucoes = df[['periodo', 'ug', 'registrado_em', 'execucao_id']].drop_duplicates()
+    ultimas = execucoes.sort_values(['registrado_em', 'execucao_id']).groupby(['periodo', 'ug']).tail(1)
+    return df[df['execucao_id'].isin(ultimas['execucao_id'])]
+
+def tendencia_divergencias(periodos=None, ugs=None, tolerancia=TOLERANCIA_CENTAVOS):
+    """Por período e UG: totais RMB e SIAFI (em centavos), diferença total e quantidade de contas divergentes."""
+    df = consultar(
+        'resultados',
+        colunas=['periodo', 'ug', 'execucao_id', 'registrado_em', 'Saldo_PDF', 'Saldo_Excel', 'Diferenca'],
+        periodos=periodos, ugs=ugs,
+    )
+    df = _ultima_execucao(df)
+    if df.empty:
+        return pd.DataFrame(columns=['periodo', 'ug', 'Saldo_PDF', 'Saldo_Excel', 'Diferenca', 'Contas_Divergentes'])
+    df = df.assign(Contas_Divergentes=(df['Diferenca'].abs() > tolerancia).astype(int))
+    return df.groupby(['periodo', 'ug'], as_index=False).agg({
+        'Saldo_PDF': 'sum',
+        'Saldo_Excel': 'sum',
+        'Diferenca': 'sum',
+        'Contas_Divergentes': 'sum',
+    }).sort_values(['ug', 'periodo'])
+
+def divergencias_recorrentes(periodos=None, ugs=None, minimo_periodos=2, tolerancia=TOLERANCIA_CENTAVOS):
+    """Contas (UG + Chave_Vinculo) que ficaram divergentes em pelo menos `minimo_periodos` períodos."""
+    df = consultar(
+        'resultados',
+        colunas=['periodo', 'ug', 'execucao_id', 'registrado_em', 'Chave_Vinculo', 'Descricao', 'Diferenca'],
+        periodos=periodos, ugs=ugs,
+    )
+    df = _ultima_execucao(df)
+    df = df[df['Diferenca'].abs() > tolerancia]
+    if df.empty:
+        return pd.DataFrame(columns=['ug', 'Chave_Vinculo', 'Descricao', 'Periodos', 'Primeiro', 'Ultimo', 'Diferenca_Ultima'])
+    df = df.sort_values('periodo')
+    recorrentes = df.groupby(['ug', 'Chave_Vinculo'], as_index=False).agg(
+        Descricao=('Descricao', 'last'),
+        Periodos=('periodo', 'nunique'),
+        Primeiro=('periodo', 'first'),
+        Ultimo=('periodo', 'last'),
+        Diferenca_Ultima=('Diferenca', 'last'),
+    )
+    return recorrentes[recorrentes['Periodos'] >= minimo_periodos].sort_values(['Periodos', 'ug'], ascending=[False, True])
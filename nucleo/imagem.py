@@ -0,0 +1,175 @@
+import numpy as np
+from PIL import Image
+
+# ==========================================
+# PRÉ-PROCESSAMENTO DAS PÁGINAS ESCANEADAS
+# ==========================================
+# Antes do OCR a página passa por: tons de cinza -> binarização adaptativa -> remoção de ruído
+# -> correção de inclinação -> detecção do corpo da tabela. Só o recorte da tabela (ou cada faixa de linha
+# dela) vai para o Tesseract, deixando de fora logotipos, cabeçalhos e margens.
+# Todas as medidas em pixels assumem páginas rasterizadas a 300 dpi.
+
+JANELA_BINARIZACAO = 41
+SENSIBILIDADE_BINARIZACAO = 0.15
+ANGULO_MAXIMO = 3.0
+PASSO_ANGULO = 0.2
+MINIMO_SEGMENTOS_TABELA = 4
+MARGEM_RECORTE = 12
+# Linhas processadas de cada vez na binarização
+LINHAS_POR_FAIXA = 256
+
+
+def para_cinza(imagem):
+    return np.asarray(imagem.convert('L'))
+
+def binarizar(cinza, janela=JANELA_BINARIZACAO, sensibilidade=SENSIBILIDADE_BINARIZACAO):
+    """
+    Binarização adaptativa pela média local (Bradley): um pixel é tinta quando é mais escuro que
+    a média da janela ao redor. Devolve uma máscara booleana (True = tinta).
+    """
+    h, w = cinza.shape
+    r = janela // 2
+    d = 2 * r + 1
+
+    # Imagem integral em uint32: as somas de janela usam aritmética modular e o resultado final
+    # é sempre exato, sem precisar de int64 para uma página inteira de 300 dpi.
+    # A integral é estendida em r linhas/colunas de cada lado repetindo a borda: assim a janela
+    # recortada na borda da página vira um simples deslocamento, e as quatro parcelas da soma
+    # são fatias (views) da mesma matriz, sem cópias indexadas do tamanho da página.
+    integral = np.zeros((h + d, w + d), dtype=np.uint32)
+    miolo = integral[r + 1:r + 1 + h, r + 1:r + 1 + w]
+    np.cumsum(cinza, axis=0, dtype=np.uint32, out=miolo)
+    np.cumsum(miolo, axis=1, out=miolo)
+    integral[r + 1 + h:] = integral[r + h]
+    integral[:, r + 1 + w:] = integral[:, r + w, None]
+
+    area_x = (np.minimum(np.arange(w) + r + 1, w) - np.maximum(np.arange(w) - r, 0)).astype(np.float32)
+    area_y = (np.minimum(np.arange(h) + r + 1, h) - np.maximum(np.arange(h) - r, 0)).astype(np.float32)
+    fator = np.float32(1.0 - sensibilidade)
+
+    # Em faixas de linhas, para que os temporários (soma, média) não ocupem uma página inteira
+    tinta = np.empty((h, w), dtype=bool)
+    for inicio in range(0, h, LINHAS_POR_FAIXA):
+        fim = min(inicio + LINHAS_POR_FAIXA, h)
+        soma = (integral[inicio + d:fim + d, d:] - integral[inicio:fim, d:]
+                - integral[inicio + d:fim + d, :w] + integral[inicio:fim, :w])
+        media = soma.astype(np.float32) / (area_y[inicio:fim, None] * area_x)
+        np.less(cinza[inicio:fim], media * fator, out=tinta[inicio:fim])
+    return tinta
+
+def remover_ruido(tinta, minimo_vizinhos=3):
+    """Descarta pontos isolados de tinta (granulado do escaneamento): exige vizinhos na janela 3x3."""
+    h, w = tinta.shape
+    borda = np.pad(tinta, 1).astype(np.uint8)
+    vizinhos = sum(borda[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3))
+    return tinta & (vizinhos > minimo_vizinhos)
+
+def _para_imagem(tinta):
+    """Máscara de tinta -> imagem em tons de cinza com texto preto sobre fundo branco."""
+    return Image.fromarray(np.where(tinta, 0, 255).astype(np.uint8))
+
+def estimar_inclinacao(tinta, angulo_maximo=ANGULO_MAXIMO, passo=PASSO_ANGULO):
+    """
+    Estima o ângulo de inclinação pelo perfil de projeção horizontal: o ângulo que deixa as
+    linhas de texto mais "nítidas" (maior variação entre linhas vizinhas) é o correto.
+    A busca é feita numa versão reduzida da página.
+    """
+    reduzida = _para_imagem(tinta).reduce(4)
+    melhor_angulo, melhor_nota = 0.0, -1.0
+    for angulo in np.arange(-angulo_maximo, angulo_maximo + passo / 2, passo):
+        girada = np.asarray(reduzida.rotate(float(angulo), resample=Image.NEAREST, fillcolor=255)) < 128
+        perfil = girada.sum(1).astype(np.int64)
+        nota = float(np.sum(np.diff(perfil) ** 2))
+        if nota > melhor_nota:
+            melhor_angulo, melhor_nota = float(angulo), nota
+    return melhor_angulo
+
+def corrigir_inclinacao(tinta, angulo):
+    if abs(angulo) < PASSO_ANGULO / 2: return tinta
+    girada = _para_imagem(tinta).rotate(angulo, resample=Image.NEAREST, fillcolor=255)
+    return np.asarray(girada) < 128
+
+def _sem_linhas_de_grade(tinta):
+    """Remove réguas horizontais e verticais da tabela, que uniriam todas as linhas numa faixa só."""
+    mascara = tinta.copy()
+    h, w = mascara.shape
+    mascara[mascara.sum(1) > 0.5 * w, :] = False
+    mascara[:, mascara.sum(0) > 0.3 * h] = False
+    return mascara
+
+def _trechos(ativos, intervalo_minimo):
+    """Converte um vetor booleano em trechos (inicio, fim) contínuos, unindo buracos menores que o intervalo."""
+    indices = np.flatnonzero(ativos)
+    if indices.size == 0: return []
+    quebras = np.flatnonzero(np.diff(indices) > intervalo_minimo)
+    inicios = np.concatenate(([indices[0]], indices[quebras + 1]))
+    fins = np.concatenate((indices[quebras], [indices[-1]])) + 1
+    return list(zip(inicios.tolist(), fins.tolist()))
+
+def _faixas(mascara):
+    perfil = mascara.sum(1)
+    faixas = _trechos(perfil > max(2, 0.002 * mascara.shape[1]), intervalo_minimo=3)
+    return [(y0, y1) for y0, y1 in faixas if y1 - y0 >= 10]
+
+def detectar_faixas(tinta):
+    """Faixas horizontais de texto (y0, y1) da página, ignorando ruídos muito baixos."""
+    return _faixas(_sem_linhas_de_grade(tinta))
+
+def detectar_regiao_tabela(tinta):
+    """
+    Localiza o corpo da tabela de saldos: o bloco entre a primeira e a última faixa com pelo
+    menos MINIMO_SEGMENTOS_TABELA grupos de texto separados (código, descrição e valores).
+    Devolve (x0, y0, x1, y1) e as faixas de linha contidas nele, ou None se não houver tabela.
+    """
+    mascara = _sem_linhas_de_grade(tinta)
+    h, w = mascara.shape
+    todas_faixas = _faixas(mascara)
+    faixas_tabela = []
+    for y0, y1 in todas_faixas:
+        # Faixas muito altas são blocos de logotipo/cabeçalho, não linhas da tabela
+        if y1 - y0 > 0.03 * h: continue
+        colunas = mascara[y0:y1].any(0)
+        segmentos = _trechos(colunas, intervalo_minimo=int(0.02 * w))
+        # Grupos estreitos demais para conter um caractere são sujeira, não colunas
+        segmentos = [(a, b) for a, b in segmentos if b - a >= 0.004 * w]
+        if len(segmentos) >= MINIMO_SEGMENTOS_TABELA:
+            faixas_tabela.append((y0, y1, segmentos[0][0], segmentos[-1][1]))
+    if not faixas_tabela: return None
+
+    topo, base = faixas_tabela[0][0], faixas_tabela[-1][1]
+    esquerda = min(f[2] for f in faixas_tabela)
+    direita = max(f[3] for f in faixas_tabela)
+    regiao = (
+        max(0, esquerda - MARGEM_RECORTE), max(0, topo - MARGEM_RECORTE),
+        min(w, direita + MARGEM_RECORTE), min(h, base + MARGEM_RECORTE),
+    )
+    faixas = [(y0, y1) for y0, y1 in todas_faixas if y0 >= topo and y1 <= base]
+    return regiao, faixas
+
+def preparar_para_ocr(imagem, por_linha=False):
+    """
+    Aplica o pré-processamento e devolve a lista de recortes [(imagem, psm)] a enviar ao OCR,
+    na ordem de leitura. O título acima da tabela vai em meia resolução (só precisa identificar
+    a seção do relatório); o corpo da tabela vai inteiro (psm 6) ou faixa a faixa (psm 7).
+    Sem tabela detectada, devolve a página binarizada inteira.
+    """
+    tinta = remover_ruido(binarizar(para_cinza(imagem)))
+    tinta = corrigir_inclinacao(tinta, estimar_inclinacao(tinta))
+
+    deteccao = detectar_regiao_tabela(tinta)
+    if deteccao is None:
+        return [(_para_imagem(tinta), 6)]
+
+    (x0, y0, x1, y1), faixas = deteccao
+    recortes = []
+    if y0 > 0 and tinta[:y0].any():
+        recortes.append((_para_imagem(tinta[:y0]).reduce(2), 6))
+
+    if por_linha and faixas:
+        recortes.extend(
+            (_para_imagem(tinta[max(0, fy0 - 4):fy1 + 4, x0:x1]), 7)
+            for fy0, fy1 in faixas
+        )
+    else:
+        recortes.append((_para_imagem(tinta[y0:y1, x0:x1]), 6))
+    return recortes
@@ -0,0 +1,173 @@
+import streamlit as st
+import os
+import re
+import time
+import uuid
+from datetime import date
+from nucleo import jobs, perfil
+
+# ==========================================
+# COMPONENTES DE TELA COMPARTILHADOS
+# ==========================================
+# Com a fila ativa, a tela apenas submete o job e acompanha o andamento; o processamento
+# acontece no worker (python worker.py) e sobrevive a recarregamentos da página.
+USAR_FILA = os.environ.get("CONCILIACAO_USAR_FILA", "0") == "1"
+
+
+def campo_periodo():
+    """Campo do mês de referência usado para registrar a conciliação no histórico."""
+    return st.text_input("🗓️ Mês de referência (AAAA-MM)", value=date.today().strftime("%Y-%m"))
+
+def validar_periodo(periodo):
+    """Devolve o período normalizado, ou interrompe a execução com um aviso se o formato for inválido."""
+    if not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', periodo.strip()):
+        st.warning("⚠️ Informe o mês de referência no formato AAAA-MM (ex.: 2026-01).")
+        st.stop()
+    return periodo.strip()
+
+def id_sessao():
+    """Identificador estável da sessão do navegador, usado no rodízio do governador de concorrência."""
+    if 'id_sessao' not in st.session_state:
+        st.session_state['id_sessao'] = uuid.uuid4().hex
+    return st.session_state['id_sessao']
+
+def opcao_perfil(pela_fila=True):
+    """
+    Caixa para perfilar a execução; só aparece com CONCILIACAO_PERFIL=1 (uso do administrador).
+    Telas cujo processamento vai para a fila (`pela_fila`) não oferecem a opção quando a fila
+    está ativa: o trabalho roda no worker, fora do alcance do perfil.
+    """
+    if not perfil.HABILITADO: return False
+    if pela_fila and USAR_FILA:
+        st.caption("🩺 Perfil de desempenho indisponível: com a fila de jobs ativa, o processamento roda no worker.")
+        return False
+    return st.checkbox("🩺 Gerar perfil de desempenho desta execução")
+
+def oferecer_perfil(captura):
+    """Botão de download do perfil capturado, se houver."""
+    if captura.artefato is None: return
+    conteudo, nome_arquivo, mime = captura.artefato
+    st.download_button(label="🩺 Baixar perfil de desempenho", data=conteudo, file_name=nome_arquivo, mime=mime)
+
+def iniciar_conciliacao(uploaded_siafi, uploaded_pdfs, periodo, perfilar=False):
+    """
+    Submete a conciliação à fila ou, sem fila, executa o pipeline aqui mesmo e exibe o resultado.
+    Com `perfilar`, a execução local é perfilada e o perfil é oferecido para download junto do relatório.
+    """
+    # Os PDFs são pareados pelo nome: de nomes repetidos, vale o primeiro (e o usuário é avisado),
+    # tanto aqui quanto na fila, onde os arquivos são gravados em disco com o próprio nome
+    pdfs, avisos = {}, []
+    for f in uploaded_pdfs:
+        if f.name in pdfs:
+            avisos.append(f"⚠️ Há mais de um PDF chamado '{f.name}'; apenas o primeiro foi considerado.")
+            continue
+        pdfs[f.name] = f
+
+    if USAR_FILA:
+        job_id = jobs.submeter_job(uploaded_siafi, list(pdfs.values()), periodo)
+        # Os avisos sobrevivem ao rerun e são exibidos no acompanhamento do job
+        st.session_state[f"avisos_job_{job_id}"] = avisos
+        st.query_params["job"] = job_id
+        st.rerun()
+
+    for aviso in avisos: st.warning(aviso)
+
+    # O pipeline (pandas, leitura de PDF, OCR) só é carregado quando uma conciliação é iniciada
+    from nucleo.conciliacao import ErroConciliacao, executar_conciliacao
+
+    progresso = st.progress(0)
+    status_text = st.empty()
+
+    def ao_progredir(fracao, mensagem):
+        progresso.progress(fracao)
+        status_text.text(mensagem)
+
+    captura = perfil.CapturaPerfil(ativa=perfilar)
+    try:
+        with captura:
+            saida = executar_conciliacao(
+                uploaded_siafi, pdfs,
+                ao_progredir=ao_progredir, periodo=periodo, sessao=id_sessao(),
+            )
+    except ErroConciliacao as e:
+        progresso.empty()
+        st.error(str(e))
+        st.stop()
+
+    progresso.empty()
+    exibir_resultados(saida)
+    oferecer_perfil(captura)
+
+# ==========================================
+# EXIBIÇÃO DOS RESULTADOS
+# ==========================================
+def exibir_resultados(saida):
+    from nucleo.valores import TOLERANCIA_CENTAVOS, em_reais
+
+    st.subheader("🔍 Resultados da Conciliação")
+
+    for resultado in saida['resultados']:
+        divergencias = resultado['divergencias']
+        soma_pdf = resultado['soma_pdf'] / 100
+        soma_excel = resultado['soma_excel'] / 100
+        dif_total = resultado['dif_total'] / 100
+
+        with st.container():
+            st.info(f"🏢 **Unidade Gestora: {resultado['ug']}**")
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total RMB (PDF)", f"R$ {soma_pdf:,.2f}")
+            col2.metric("Total SIAFI (Excel)", f"R$ {soma_excel:,.2f}")
+            col3.metric("Diferença Encontrada", f"R$ {dif_total:,.2f}", delta_color="inverse" if abs(resultado['dif_total']) > TOLERANCIA_CENTAVOS else "normal")
+
+            if not divergencias.empty:
+                st.warning(f"Atenção: Foram encontradas {len(divergencias)} conta(s) com divergência de valores.")
+                with st.expander("Visualizar Contas com Divergência"):
+                    st.dataframe(em_reais(divergencias)[['Chave_Vinculo', 'Descricao', 'Saldo_PDF', 'Saldo_Excel', 'Diferenca']])
+            else:
+                st.success("✅ Conciliado com sucesso! Nenhuma divergência de valores foi encontrada.")
+
+            if resultado['tem_estoque_com_saldo']:
+                st.info(f"Aviso Contábil: A Conta de Estoque Interno (123110801) possui saldo de R$ {resultado['saldo_estoque'] / 100:,.2f}.")
+            st.markdown("---")
+
+    # Exibe os avisos apenas se houver algum
+    if saida['avisos']:
+        st.warning("⚠️ **Avisos do Sistema:**")
+        for aviso in saida['avisos']:
+            st.write(f"- {aviso}")
+
+    # Botão final de Download
+    if saida['relatorio_pdf'] is not None:
+        st.download_button(
+            label="📥 BAIXAR RELATÓRIO CONSOLIDADO (.PDF)", 
+            data=saida['relatorio_pdf'], 
+            file_name="Relatorio_Conciliacao_Patrimonial.pdf", 
+            mime="application/pdf", 
+            type="primary", 
+            use_container_width=True
+        )
+    else:
+        st.error("Ocorreu um erro ao gerar o arquivo PDF para download.")
+
+def acompanhar_job(job_id):
+    """Mostra o andamento de um job da fila; enquanto não termina, a página se atualiza sozinha."""
+    job = jobs.obter_job(job_id)
+    if job is None:
+        st.error("❌ A conciliação solicitada não foi encontrada. Ela pode ter expirado; envie os arquivos novamente.")
+        return
+
+    for aviso in st.session_state.get(f"avisos_job_{job_id}", []): st.warning(aviso)
+    if job['status'] == jobs.CONCLUIDO:
+        exibir_resultados(jobs.carregar_resultado(job_id))
+    elif job['status'] == jobs.FALHOU:
+        st.error(job['erro'])
+    else:
+        if job['status'] == jobs.PENDENTE:
+            st.text(f"Aguardando na fila de processamento (posição {job['posicao_fila']})...")
+        else:
+            st.text(job['mensagem'] or "Processando...")
+        st.progress(min(max(job['progresso'], 0.0), 1.0))
+        st.caption("Você pode fechar ou recarregar esta página: o processamento continua no servidor.")
+        time.sleep(2)
+        st.rerun()
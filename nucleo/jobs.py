@@ -0,0 +1,255 @@
+import sqlite3
+import json
+import os
+import shutil
+import time
+import uuid
+
+# ==========================================
+# FILA DE JOBS (SQLITE + SISTEMA DE ARQUIVOS)
+# ==========================================
+# Cada job tem uma linha no banco e uma pasta própria:
+#   <DIR_JOBS>/<job_id>/entrada/  -> planilha SIAFI e PDFs enviados
+#   <DIR_JOBS>/<job_id>/saida/    -> resultado.json e relatório PDF gerados pelo worker
+DIR_JOBS = os.environ.get("CONCILIACAO_DIR_JOBS", "dados_jobs")
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+
+# Quantas vezes um job pode ser retomado antes de ser dado como falho: um arquivo que derruba
+# o processo do worker não deve voltar para a fila indefinidamente
+MAXIMO_TENTATIVAS = int(os.environ.get("CONCILIACAO_MAX_TENTATIVAS", 3))
+
+ARQUIVO_RESULTADO = 'resultado.json'
+ARQUIVO_RELATORIO = 'Relatorio_Conciliacao_Patrimonial.pdf'
+
+
+def _caminho_banco():
+    return os.path.join(DIR_JOBS, "jobs.db")
+
+def _pasta_job(job_id, subpasta=''):
+    return os.path.join(DIR_JOBS, job_id, subpasta)
+
+def conectar():
+    os.makedirs(DIR_JOBS, exist_ok=True)
+    conn = sqlite3.connect(_caminho_banco(), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            planilha TEXT NOT NULL,
+            pdfs TEXT NOT NULL,
+            periodo TEXT,
+            progresso REAL NOT NULL DEFAULT 0,
+            mensagem TEXT,
+            erro TEXT,
+            worker TEXT,
+            criado_em REAL NOT NULL,
+            iniciado_em REAL,
+            concluido_em REAL,
+            heartbeat REAL,
+            tentativas INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, criado_em)")
+    return conn
+
+def _salvar_arquivo(pasta, arquivo):
+    """Grava um upload (objeto com .name e .read()) na pasta do job e devolve o nome usado."""
+    nome = os.path.basename(arquivo.name)
+    arquivo.seek(0)
+    with open(os.path.join(pasta, nome), 'wb') as destino:
+        shutil.copyfileobj(arquivo, destino)
+    return nome
+
+# ==========================================
+# LADO DA INTERFACE
+# ==========================================
+def submeter_job(arquivo_siafi, arquivos_pdf, periodo=None):
+    """Copia os arquivos enviados para a pasta do job e o coloca na fila. Devolve o id do job."""
+    job_id = uuid.uuid4().hex
+    pasta_entrada = _pasta_job(job_id, 'entrada')
+    os.makedirs(pasta_entrada, exist_ok=True)
+
+    planilha = _salvar_arquivo(pasta_entrada, arquivo_siafi)
+    pdfs = [_salvar_arquivo(pasta_entrada, f) for f in arquivos_pdf]
+
+    conn = conectar()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, status, planilha, pdfs, periodo, mensagem, criado_em) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, PENDENTE, planilha, json.dumps(pdfs), periodo, "Aguardando na fila de processamento...", time.time())
+        )
+    finally:
+        conn.close()
+    return job_id
+
+def obter_job(job_id):
+    """Devolve o estado atual do job como dict, ou None se ele não existir."""
+    conn = conectar()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None: return None
+        job = dict(row)
+        if job['status'] == PENDENTE:
+            job['posicao_fila'] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND criado_em <= ?", (PENDENTE, job['criado_em'])
+            ).fetchone()[0]
+        return job
+    finally:
+        conn.close()
+
+def carregar_resultado(job_id):
+    """Lê os artefatos de um job concluído no mesmo formato devolvido por executar_conciliacao."""
+    import pandas as pd
+
+    pasta_saida = _pasta_job(job_id, 'saida')
+    with open(os.path.join(pasta_saida, ARQUIVO_RESULTADO), encoding='utf-8') as f:
+        dados = json.load(f)
+
+    for resultado in dados['resultados']:
+        resultado['final'] = pd.DataFrame(resultado['final'])
+        resultado['divergencias'] = pd.DataFrame(
+            resultado['divergencias'], columns=['Chave_Vinculo', 'Descricao', 'Saldo_PDF', 'Saldo_Excel', 'Diferenca']
+        )
+
+    dados['relatorio_pdf'] = None
+    caminho_pdf = os.path.join(pasta_saida, ARQUIVO_RELATORIO)
+    if os.path.exists(caminho_pdf):
+        with open(caminho_pdf, 'rb') as f:
+            dados['relatorio_pdf'] = f.read()
+    return dados
+
+# ==========================================
+# LADO DO WORKER
+# ==========================================
+def reivindicar_proximo_job(worker_id):
+    """
+    Marca atomicamente o job pendente mais antigo como em execução e o devolve (ou None).
+    Cada reivindicação conta uma tentativa.
+    """
+    conn = conectar()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY criado_em LIMIT 1", (PENDENTE,)
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        agora = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker = ?, iniciado_em = ?, heartbeat = ?, mensagem = ?, tentativas = tentativas + 1 WHERE id = ?",
+            (EXECUTANDO, worker_id, agora, agora, "Processamento iniciado...", row['id'])
+        )
+        conn.execute("COMMIT")
+        job = dict(row)
+        job['status'] = EXECUTANDO
+        job['tentativas'] += 1
+        return job
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def caminhos_entrada(job):
+    """Devolve o caminho da planilha e os caminhos dos PDFs de um job, na ordem do envio."""
+    pasta_entrada = _pasta_job(job['id'], 'entrada')
+    planilha = os.path.join(pasta_entrada, job['planilha'])
+    pdfs = [os.path.join(pasta_entrada, nome) for nome in json.loads(job['pdfs'])]
+    return planilha, pdfs
+
+def atualizar_progresso(job_id, fracao=None, mensagem=None):
+    """Registra o progresso do job; também serve de heartbeat do worker."""
+    conn = conectar()
+    try:
+        conn.execute(
+            "UPDATE jobs SET progresso = COALESCE(?, progresso), mensagem = COALESCE(?, mensagem), heartbeat = ? WHERE id = ?",
+            (fracao, mensagem, time.time(), job_id)
+        )
+    finally:
+        conn.close()
+
+def concluir_job(job_id, saida):
+    """Grava o resultado de executar_conciliacao na pasta do job e o marca como concluído."""
+    pasta_saida = _pasta_job(job_id, 'saida')
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    resultados = []
+    for resultado in saida['resultados']:
+        serializado = dict(resultado)
+        serializado['final'] = resultado['final'].to_dict('records')
+        serializado['divergencias'] = resultado['divergencias'].to_dict('records')
+        resultados.append(serializado)
+
+    with open(os.path.join(pasta_saida, ARQUIVO_RESULTADO), 'w', encoding='utf-8') as f:
+        json.dump({'resultados': resultados, 'avisos': saida['avisos']}, f, ensure_ascii=False, default=str)
+    if saida['relatorio_pdf'] is not None:
+        with open(os.path.join(pasta_saida, ARQUIVO_RELATORIO), 'wb') as f:
+            f.write(saida['relatorio_pdf'])
+
+    conn = conectar()
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, progresso = 1, mensagem = ?, concluido_em = ? WHERE id = ?",
+            (CONCLUIDO, "Concluído! O relatório final está pronto para download.", time.time(), job_id)
+        )
+    finally:
+        conn.close()
+
+def falhar_job(job_id, erro):
+    conn = conectar()
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, erro = ?, concluido_em = ? WHERE id = ?",
+            (FALHOU, erro, time.time(), job_id)
+        )
+    finally:
+        conn.close()
+
+def recuperar_jobs_orfaos(tempo_limite=120):
+    """
+    Devolve para a fila os jobs cujo worker parou de enviar heartbeat (ex.: processo encerrado).
+    Jobs que já esgotaram MAXIMO_TENTATIVAS são marcados como falhos em vez de voltar para a fila.
+    """
+    limite_heartbeat = time.time() - tempo_limite
+    conn = conectar()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, erro = ?, concluido_em = ? "
+            "WHERE status = ? AND heartbeat < ? AND tentativas >= ?",
+            (FALHOU, "❌ O processamento foi interrompido repetidas vezes com estes arquivos. Verifique os arquivos enviados ou contate o suporte técnico.",
+             time.time(), EXECUTANDO, limite_heartbeat, MAXIMO_TENTATIVAS)
+        )
+        cursor = conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, mensagem = ? WHERE status = ? AND heartbeat < ?",
+            (PENDENTE, "Reenfileirado após interrupção do worker...", EXECUTANDO, limite_heartbeat)
+        )
+        conn.execute("COMMIT")
+        return cursor.rowcount
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def limpar_jobs_antigos(dias=7):
+    """Remove do banco e do disco os jobs finalizados há mais de `dias` dias."""
+    limite = time.time() - dias * 86400
+    conn = conectar()
+    try:
+        rows = conn.execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) AND concluido_em < ?", (CONCLUIDO, FALHOU, limite)
+        ).fetchall()
+        for row in rows:
+            shutil.rmtree(_pasta_job(row['id']), ignore_errors=True)
+            conn.execute("DELETE FROM jobs WHERE id = ?", (row['id'],))
+        return len(rows)
+    finally:
+        conn.close()
@@ -0,0 +1,48 @@
+import re
+from nucleo.erros import ErroConciliacao
+
+# ==========================================
+# MATRIZ DE RELACIONAMENTO (MATRIZ.xlsx)
+# ==========================================
+# pandas é importado dentro das funções: as telas importam este módulo só pelo CAMINHO_MATRIZ
+CAMINHO_MATRIZ = "MATRIZ.xlsx"
+
+
+def carregar_matriz(caminho_matriz=CAMINHO_MATRIZ):
+    """Lê a MATRIZ e devolve o mapeamento conta 123... -> código 449..., independente da ordem das colunas."""
+    import pandas as pd
+    try:
+        df_matriz = pd.read_excel(caminho_matriz, header=None)
+        dict_matriz = {}
+        for i in range(len(df_matriz)):
+            c0 = str(df_matriz.iloc[i, 0]).strip().replace('.0', '')
+            c1 = str(df_matriz.iloc[i, 1]).strip().replace('.0', '')
+            if c0.startswith('123'): dict_matriz[c0] = c1
+            elif c1.startswith('123'): dict_matriz[c1] = c0
+    except Exception as e:
+        raise ErroConciliacao("❌ Ocorreu um erro ao ler a Matriz de configuração. Verifique o arquivo MATRIZ.xlsx.") from e
+    return dict_matriz
+
+def carregar_descricoes(caminho_matriz=CAMINHO_MATRIZ):
+    """
+    Lê as colunas A:B da MATRIZ e devolve o DataFrame e o índice chave -> descrição (PROCV).
+    O índice é uma Series com descrições categóricas: a busca vira uma junção vetorizada
+    e a estrutura é barata de enviar aos processos do pool.
+    """
+    import pandas as pd
+
+    df_matriz = pd.read_excel(caminho_matriz, usecols="A:B", header=None)
+    df_matriz.columns = ['Chave', 'Descricao']
+    df_matriz = df_matriz.drop_duplicates(subset=['Chave'], keep='first')
+    indice_descricoes = pd.Series(pd.Categorical(df_matriz['Descricao']), index=pd.Index(df_matriz['Chave']))
+    return df_matriz, indice_descricoes
+
+def get_chave_vinculo(conta, dict_matriz):
+    conta = str(conta).strip()
+    if conta in dict_matriz:
+        val_matriz = str(dict_matriz[conta])
+        match = re.search(r'(\d+)$', val_matriz)
+        if match:
+            digits = match.group(1)
+            return int(digits[-2:]) if len(digits) >= 2 else int(digits)
+    return None
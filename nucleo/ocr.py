@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+
+# ==========================================
+# MOTORES DE OCR
+# ==========================================
+# O pytesseract grava a imagem em arquivo temporário e inicia um processo `tesseract` por
+# página, recarregando o modelo `por` a cada chamada. Quando o binding nativo (tesserocr)
+# está instalado, mantemos instâncias do Tesseract vivas no processo, com o modelo já
+# carregado, e entregamos as páginas como imagens em memória.
+#
+# CONCILIACAO_OCR escolhe o motor: 'auto' (padrão: tesserocr se disponível), 'tesserocr'
+# ou 'pytesseract'. CONCILIACAO_OCR_INSTANCIAS limita quantas instâncias nativas ficam
+# carregadas ao mesmo tempo (cada uma atende uma página por vez).
+IDIOMA = 'por'
+PSM_BLOCO_UNICO = 6
+
+
+class MotorPytesseract:
+    """Motor de reserva: um processo `tesseract` por página, via pytesseract."""
+    nome = 'pytesseract'
+
+    def reconhecer(self, imagem, psm=PSM_BLOCO_UNICO):
+        import pytesseract
+        return pytesseract.image_to_string(imagem, lang=IDIOMA, config=f'--psm {psm}')
+
+
+class MotorTesserocr:
+    """Instâncias persistentes do Tesseract via tesserocr, reaproveitadas entre páginas e sessões."""
+    nome = 'tesserocr'
+
+    def __init__(self, instancias):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._maximo = max(1, instancias)
+        self._livres = queue.Queue()
+        self._criadas = 0
+        self._trava = threading.Lock()
+        # Cria a primeira instância já aqui, para falhar cedo se o modelo 'por' não estiver instalado
+        self._livres.put(self._nova_instancia())
+
+    def _nova_instancia(self):
+        api = self._tesserocr.PyTessBaseAPI(lang=IDIOMA, psm=PSM_BLOCO_UNICO)
+        self._criadas += 1
+        return api
+
+    def _obter_instancia(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava:
+            if self._criadas < self._maximo:
+                return self._nova_instancia()
+        return self._livres.get()
+
+    def reconhecer(self, imagem, psm=PSM_BLOCO_UNICO):
+        api = self._obter_instancia()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImage(imagem)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._livres.put(api)
+
+
+_motor = None
+_trava_motor = threading.Lock()
+
+def obter_motor():
+    """Devolve o motor de OCR do processo, criado na primeira página que precisar de OCR."""
+    global _motor
+    if _motor is not None: return _motor
+
+    with _trava_motor:
+        if _motor is None:
+            escolha = os.environ.get("CONCILIACAO_OCR", "auto").lower()
+            instancias = int(os.environ.get("CONCILIACAO_OCR_INSTANCIAS", os.cpu_count() or 1))
+            if escolha in ('auto', 'tesserocr'):
+                try:
+                    _motor = MotorTesserocr(instancias)
+                except Exception:
+                    # Sem o binding nativo (ou sem o modelo), cai para o pytesseract
+                    if escolha == 'tesserocr': raise
+            if _motor is None:
+                _motor = MotorPytesseract()
+    return _motor
@@ -0,0 +1,102 @@
+import io
+import os
+import zipfile
+
+# ==========================================
+# ENVIO EM PACOTE (.ZIP)
+# ==========================================
+# Em vez de arrastar dezenas de PDFs, o usuário pode enviar um único .zip com os relatórios
+# RMB (e, se quiser, a Planilha SIAFI). Os PDFs não são extraídos de uma vez: cada membro só é
+# descompactado quando o pipeline o lê, e os bytes são descartados ao fim da UG.
+EXTENSOES_ACEITAS = ('.pdf', '.xlsx')
+COMPRESSOES_SUPORTADAS = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA)
+
+# Erros possíveis ao descompactar um membro: CRC/cabeçalho corrompido, membro protegido por
+# senha ou método de compressão não suportado (ex.: deflate64)
+ERROS_MEMBRO = (zipfile.BadZipFile, RuntimeError, NotImplementedError, EOFError, OSError)
+
+
+class MembroZip:
+    """
+    PDF dentro do .zip enviado, com a mesma interface dos uploads (.name, seek(0), read()).
+    O conteúdo é descompactado sob demanda a cada leitura; nada fica guardado no objeto.
+    """
+
+    def __init__(self, pacote, info):
+        self._pacote = pacote
+        self._info = info
+        self._fluxo = None
+        self.name = os.path.basename(info.filename)
+        self.size = info.file_size
+
+    def seek(self, posicao, whence=io.SEEK_SET):
+        if posicao != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Membros do .zip só podem ser relidos desde o início.")
+        self.close()
+        return 0
+
+    def read(self, tamanho=-1):
+        if self._fluxo is None:
+            self._fluxo = self._pacote.open(self._info)
+        return self._fluxo.read(tamanho)
+
+    def close(self):
+        if self._fluxo is not None:
+            self._fluxo.close()
+            self._fluxo = None
+
+def _membros_validos(pacote, nome_pacote, avisos):
+    for info in pacote.infolist():
+        nome = os.path.basename(info.filename)
+        # Pastas, arquivos ocultos e metadados do macOS não são relatórios
+        if info.is_dir() or nome.startswith('.') or info.filename.startswith('__MACOSX/'): continue
+        if not nome.lower().endswith(EXTENSOES_ACEITAS): continue
+
+        # Verificações baratas, feitas só com o índice do .zip, antes de descompactar qualquer coisa
+        if info.flag_bits & 0x1:
+            avisos.append(f"O arquivo '{info.filename}' dentro de '{nome_pacote}' está protegido por senha e foi ignorado.")
+        elif info.compress_type not in COMPRESSOES_SUPORTADAS:
+            avisos.append(f"O arquivo '{info.filename}' dentro de '{nome_pacote}' usa uma compressão não suportada e foi ignorado.")
+        else:
+            yield info
+
+def expandir_envios(arquivos, avisos):
+    """
+    Devolve a lista de arquivos enviados com cada .zip substituído pelos seus PDFs e planilhas.
+    Os PDFs viram MembroZip (lidos sob demanda); a planilha é descompactada para a memória,
+    pois o leitor de Excel precisa de acesso aleatório. Pacotes ou membros ilegíveis e arquivos
+    com nome repetido (mesmo nome em pastas diferentes) são ignorados com um aviso em `avisos`.
+    """
+    expandidos = []
+    nomes = set()
+    for arquivo in arquivos:
+        if not arquivo.name.lower().endswith('.zip'):
+            expandidos.append(arquivo)
+            continue
+        try:
+            pacote = zipfile.ZipFile(arquivo)
+        except zipfile.BadZipFile:
+            avisos.append(f"O arquivo '{arquivo.name}' não é um .zip válido e foi ignorado.")
+            continue
+
+        for info in _membros_validos(pacote, arquivo.name, avisos):
+            if info.filename.lower().endswith('.pdf'):
+                expandidos.append(MembroZip(pacote, info))
+                continue
+            try:
+                planilha = io.BytesIO(pacote.read(info))
+            except ERROS_MEMBRO:
+                avisos.append(f"Não foi possível descompactar '{info.filename}' de '{arquivo.name}'; o arquivo foi ignorado.")
+                continue
+            planilha.name = os.path.basename(info.filename)
+            expandidos.append(planilha)
+
+    # O pipeline identifica os arquivos pelo nome: de nomes repetidos, vale o primeiro
+    unicos = []
+    for item in expandidos:
+        if item.name in nomes:
+            avisos.append(f"Há mais de um arquivo chamado '{item.name}'; apenas o primeiro foi considerado.")
+            continue
+        nomes.add(item.name)
+        unicos.append(item)
+    return unicos
@@ -0,0 +1,65 @@
+import io
+import os
+import time
+import marshal
+
+# ==========================================
+# PERFIL DE DESEMPENHO SOB DEMANDA
+# ==========================================
+# Com CONCILIACAO_PERFIL=1 as telas mostram a opção "gerar perfil desta execução". O perfil é
+# capturado no próprio servidor, com os arquivos reais do usuário, e devolvido como download
+# junto do resultado: os dados não precisam sair do ambiente para achar o gargalo.
+#
+# O artefato é um HTML interativo do pyinstrument (amostragem, baixo custo) com a árvore de
+# chamadas. Se o pyinstrument não puder ser importado no ambiente, recorremos ao cProfile da
+# biblioteca padrão e entregamos um arquivo .pstats (abrir com `python -m pstats` ou snakeviz).
+# Só a thread da sessão é medida: processos filhos (pool de abas, worker da fila) ficam de fora.
+HABILITADO = os.environ.get("CONCILIACAO_PERFIL", "0") == "1"
+
+# Intervalo de amostragem do pyinstrument, em segundos
+INTERVALO_AMOSTRAGEM = 0.001
+
+
+class CapturaPerfil:
+    """
+    Gerenciador de contexto que perfila o bloco quando `ativa` é verdadeiro. Ao sair, `artefato`
+    guarda (conteudo, nome_arquivo, mime); inativo, não faz nada e `artefato` fica None.
+    """
+
+    def __init__(self, ativa=True, nome="perfil_conciliacao"):
+        self.ativa = ativa
+        self.nome = nome
+        self.artefato = None
+        self._perfilador = None
+
+    def __enter__(self):
+        if not self.ativa: return self
+        try:
+            from pyinstrument import Profiler
+            self._perfilador = Profiler(interval=INTERVALO_AMOSTRAGEM)
+            self._perfilador.start()
+        except ImportError:
+            import cProfile
+            perfilador = cProfile.Profile()
+            try: perfilador.enable()
+            except ValueError: return self  # Outra captura já ativa no processo (Python 3.12+): segue sem perfil
+            self._perfilador = perfilador
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        if self._perfilador is None: return False
+        carimbo = time.strftime('%Y%m%d_%H%M%S')
+
+        if not hasattr(self._perfilador, 'enable'):
+            self._perfilador.stop()
+            conteudo = self._perfilador.output_html().encode('utf-8')
+            self.artefato = (conteudo, f"{self.nome}_{carimbo}.html", "text/html")
+        else:
+            self._perfilador.disable()
+            self._perfilador.create_stats()
+            # Mesmo formato gravado por Profile.dump_stats, lido por pstats.Stats
+            buffer = io.BytesIO()
+            marshal.dump(self._perfilador.stats, buffer)
+            self.artefato = (buffer.getvalue(), f"{self.nome}_{carimbo}.pstats", "application/octet-stream")
+        self._perfilador = None
+        return False
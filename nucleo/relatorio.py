@@ -0,0 +1,64 @@
+from fpdf import FPDF, XPos, YPos
+from nucleo.valores import TOLERANCIA_CENTAVOS, formatar_centavos
+
+# ==========================================
+# RELATÓRIO PDF DA CONCILIAÇÃO
+# ==========================================
+# Módulo importado apenas na etapa de geração do relatório (fpdf2 é carregado sob demanda).
+
+class PDF_Report(FPDF):
+    def header(self):
+        self.set_font('helvetica', 'B', 12)
+        self.cell(0, 10, 'Relatório de Conferência Patrimonial', align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.ln(5)
+    def footer(self):
+        self.set_y(-15); self.set_font('helvetica', 'I', 8)
+        self.cell(0, 10, f'Página {self.page_no()}', align='C')
+
+def escrever_secao_ug(pdf_out, resultado):
+    """Escreve no relatório a seção de uma Unidade Gestora."""
+    divergencias = resultado['divergencias']
+
+    pdf_out.set_font("helvetica", 'B', 11)
+    pdf_out.set_fill_color(240, 240, 240)
+    pdf_out.cell(0, 10, text=f"Unidade Gestora: {resultado['ug']}", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
+
+    if not divergencias.empty:
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.set_fill_color(255, 200, 200)
+        pdf_out.cell(15, 8, "Item", 1, fill=True)
+        pdf_out.cell(85, 8, "Descrição da Conta", 1, fill=True)
+        pdf_out.cell(30, 8, "SALDO RMB", 1, fill=True)
+        pdf_out.cell(30, 8, "SALDO SIAFI", 1, fill=True)
+        pdf_out.cell(30, 8, "Diferença", 1, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        pdf_out.set_font("helvetica", '', 8)
+        for _, row in divergencias.iterrows():
+            pdf_out.cell(15, 7, str(int(row['Chave_Vinculo'])), 1)
+            pdf_out.cell(85, 7, str(row['Descricao'])[:48], 1)
+            pdf_out.cell(30, 7, formatar_centavos(row['Saldo_PDF']), 1)
+            pdf_out.cell(30, 7, formatar_centavos(row['Saldo_Excel']), 1)
+            pdf_out.set_text_color(200, 0, 0)
+            pdf_out.cell(30, 7, formatar_centavos(row['Diferenca']), 1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf_out.set_text_color(0, 0, 0)
+    else:
+        pdf_out.set_font("helvetica", 'I', 9)
+        pdf_out.cell(0, 8, "Nenhuma divergência encontrada entre SIAFI e RMB.", 1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    if resultado['tem_estoque_com_saldo']:
+        pdf_out.ln(2)
+        pdf_out.set_font("helvetica", 'B', 9)
+        pdf_out.set_fill_color(255, 255, 200)
+        pdf_out.cell(100, 8, "SALDO ESTOQUE INTERNO (123110801)", 1, fill=True)
+        pdf_out.cell(90, 8, f"R$ {formatar_centavos(resultado['saldo_estoque'])}", 1, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf_out.ln(2)
+    pdf_out.set_font("helvetica", 'B', 9)
+    pdf_out.set_fill_color(220, 230, 241)
+    pdf_out.cell(100, 8, "RESUMO DOS TOTAIS", 1, fill=True)
+    pdf_out.cell(30, 8, formatar_centavos(resultado['soma_pdf']), 1, fill=True)
+    pdf_out.cell(30, 8, formatar_centavos(resultado['soma_excel']), 1, fill=True)
+    if abs(resultado['dif_total']) > TOLERANCIA_CENTAVOS: pdf_out.set_text_color(200, 0, 0)
+    pdf_out.cell(30, 8, formatar_centavos(resultado['dif_total']), 1, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf_out.set_text_color(0, 0, 0)
+    pdf_out.ln(5)
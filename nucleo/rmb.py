@@ -0,0 +1,219 @@
+import io
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from nucleo.valores import para_centavos
+
+# ==========================================
+# LEITURA DOS RELATÓRIOS RMB (PDF)
+# ==========================================
+# pdfplumber e o motor de OCR são importados apenas quando um PDF é lido,
+# para não pesarem na inicialização das telas.
+
+# OCR faixa a faixa (psm 7) em vez do corpo da tabela inteiro. Compensa com o motor
+# nativo (tesserocr); com o pytesseract cada faixa seria um processo novo.
+OCR_POR_LINHA = os.environ.get("CONCILIACAO_OCR_POR_LINHA", "0") == "1"
+
+# Seções do relatório, identificadas por uma leitura barata da faixa superior de cada página.
+# As páginas de movimentação (entradas e saídas) não contribuem para o Saldo_PDF.
+SECAO_SALDOS = 'saldos'
+SECAO_MOVIMENTACAO = 'movimentacao'
+MARCADORES_MOVIMENTACAO = ("DE ENTRADAS", "DE SAÍDAS")
+FAIXA_CABECALHO = 0.2
+DPI_CABECALHO = 150
+
+# Encerra a leitura na primeira página de movimentação após o resumo de saldos. Desligue
+# (CONCILIACAO_RMB_PARAR_APOS_RESUMO=0) para relatórios com saldos depois da movimentação.
+PARAR_APOS_RESUMO = os.environ.get("CONCILIACAO_RMB_PARAR_APOS_RESUMO", "1") == "1"
+
+# Mapas de seções por hash do documento (os mais recentes ficam em memória)
+MAXIMO_MAPAS = 128
+_mapas_secoes = OrderedDict()
+_trava_mapas = threading.Lock()
+
+# O pdfium não é seguro para chamadas simultâneas entre threads: toda chamada a ele neste processo
+# (leitura de cabeçalho, abertura do documento e rasterização pelo pdfplumber) passa por esta trava.
+# Só a renderização fica serializada; pré-processamento e OCR continuam em paralelo.
+_trava_pdfium = threading.Lock()
+
+def rasterizar_pagina(page, pdf_bytes, dpi=300):
+    """
+    Renderiza a página em memória pelo próprio pdfplumber (pdfium), sem arquivo temporário nem
+    processo externo. Se a renderização falhar, recorre ao pdf2image (poppler).
+    """
+    try:
+        with _trava_pdfium:
+            return page.to_image(resolution=dpi).original
+    except Exception:
+        from pdf2image import convert_from_bytes
+        imagens = convert_from_bytes(pdf_bytes, first_page=page.page_number, last_page=page.page_number, dpi=dpi)
+        return imagens[0] if imagens else None
+
+def ocr_pagina(page, pdf_bytes):
+    """
+    Rasteriza uma página do PDF a 300 dpi, recorta o corpo da tabela (nucleo/imagem.py) e devolve
+    o texto reconhecido pelo motor de OCR. Se o pré-processamento falhar, a página vai inteira.
+    Cada página ocupa uma vaga de OCR do servidor (nucleo/governador.py) do início ao fim.
+    """
+    from nucleo.ocr import obter_motor
+    from nucleo.imagem import preparar_para_ocr
+    from nucleo.governador import pagina_ocr
+
+    with pagina_ocr():
+        imagem = rasterizar_pagina(page, pdf_bytes)
+        if imagem is None: return None
+
+        motor = obter_motor()
+        try:
+            recortes = preparar_para_ocr(imagem, por_linha=OCR_POR_LINHA)
+        except Exception:
+            recortes = [(imagem, 6)]
+        return '\n'.join(motor.reconhecer(recorte, psm=psm) for recorte, psm in recortes)
+
+def _e_movimentacao(texto):
+    texto = texto.upper()
+    return any(marcador in texto for marcador in MARCADORES_MOVIMENTACAO)
+
+def ler_cabecalho(documento, indice):
+    """
+    Lê apenas a faixa superior da página pelo pdfium (código nativo, sem montar o layout da página
+    inteira como o pdfplumber): pela camada de texto ou, em página escaneada, por OCR da faixa em
+    baixa resolução. Muito mais barato que extrair ou reconhecer a página inteira.
+    """
+    with _trava_pdfium:
+        pagina = documento[indice]
+        try:
+            largura, altura = pagina.get_size()
+            base_faixa = altura * (1 - FAIXA_CABECALHO)
+            camada_texto = pagina.get_textpage()
+            try:
+                if camada_texto.count_chars() >= 50:
+                    return camada_texto.get_text_bounded(left=0, bottom=base_faixa, right=largura, top=altura)
+            finally:
+                camada_texto.close()
+            imagem = pagina.render(scale=DPI_CABECALHO / 72, crop=(0, base_faixa, 0, 0)).to_pil()
+        finally:
+            pagina.close()
+
+    from nucleo.ocr import obter_motor
+    from nucleo.governador import pagina_ocr
+    with pagina_ocr():
+        return obter_motor().reconhecer(imagem)
+
+def classificar_pagina(documento, indice):
+    """Seção da página pelo título no cabeçalho. Na dúvida, a página é tratada como de saldos e lida por inteiro."""
+    try:
+        cabecalho = ler_cabecalho(documento, indice)
+    except Exception:
+        return SECAO_SALDOS
+    return SECAO_MOVIMENTACAO if _e_movimentacao(cabecalho) else SECAO_SALDOS
+
+def _obter_mapa(hash_pdf):
+    with _trava_mapas:
+        mapa = _mapas_secoes.get(hash_pdf)
+        if mapa is None: return None
+        _mapas_secoes.move_to_end(hash_pdf)
+        return {'secoes': dict(mapa['secoes']), 'ultima': mapa['ultima']}
+
+def _guardar_mapa(hash_pdf, mapa):
+    with _trava_mapas:
+        _mapas_secoes[hash_pdf] = mapa
+        _mapas_secoes.move_to_end(hash_pdf)
+        while len(_mapas_secoes) > MAXIMO_MAPAS:
+            _mapas_secoes.popitem(last=False)
+
+def _extrair_linhas(txt, is_ocr, pagina):
+    """Linhas de saldo (chave + valores) do texto de uma página."""
+    linhas = []
+    for line in txt.split('\n'):
+        line = line.strip()
+        if re.match(r'^"?\d+', line):
+            vals = []
+            if is_ocr:
+                vals_raw = re.findall(r'([\d\.\s]+,\d{2})', line)
+                vals = [v.replace(' ', '') for v in vals_raw]
+            else:
+                vals = re.findall(r'([0-9]{1,3}(?:[.,][0-9]{3})*[.,]\d{2})', line)
+
+            if len(vals) >= 4:
+                chave_match = re.match(r'^"?(\d+)', line)
+                if chave_match:
+                    chave_raw = chave_match.group(1)
+                    chave_final = int(chave_raw[-2:]) if len(chave_raw) >= 4 else int(chave_raw)
+
+                    linhas.append({
+                        'Pagina': pagina,
+                        'Chave_Vinculo': chave_final,
+                        'Saldo_PDF': para_centavos(vals[-4])
+                    })
+    return linhas
+
+def ler_pdf_rmb(pdf_bytes, hash_pdf=None):
+    """
+    Extrai os saldos do relatório RMB, recorrendo ao OCR nas páginas sem camada de texto.
+    Cada página é classificada pelo cabeçalho antes da leitura completa: as seções de entradas e
+    saídas são puladas sem extração nem OCR, e a leitura termina quando o resumo de saldos acaba.
+    O mapa de seções fica guardado por hash do documento, e releituras vão direto às páginas úteis.
+    Devolve as linhas lidas (com a página de origem); a soma por Chave_Vinculo fica para o cruzamento.
+    """
+    import pdfplumber
+    import pypdfium2
+
+    hash_pdf = hash_pdf or hashlib.sha256(pdf_bytes).hexdigest()
+    mapa = _obter_mapa(hash_pdf)
+    conhecido = mapa is not None
+    if not conhecido: mapa = {'secoes': {}, 'ultima': None}
+
+    with _trava_pdfium:
+        documento = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as p_doc:
+            dados_pdf = _ler_paginas(p_doc, documento, pdf_bytes, mapa, conhecido)
+    finally:
+        with _trava_pdfium:
+            documento.close()
+
+    if not conhecido: _guardar_mapa(hash_pdf, mapa)
+    return pd.DataFrame(dados_pdf, columns=['Pagina', 'Chave_Vinculo', 'Saldo_PDF']).astype('int64')
+
+def _ler_paginas(p_doc, documento, pdf_bytes, mapa, conhecido):
+    """Percorre as páginas seguindo (ou montando) o mapa de seções e devolve as linhas de saldo lidas."""
+    dados_pdf = []
+    resumo_lido = False
+
+    for indice, page in enumerate(p_doc.pages):
+        pagina = page.page_number
+        if conhecido:
+            if mapa['ultima'] is not None and pagina > mapa['ultima']: break
+            secao = mapa['secoes'].get(pagina, SECAO_SALDOS)
+        else:
+            secao = classificar_pagina(documento, indice)
+
+        txt = None
+        is_ocr = False
+        if secao == SECAO_SALDOS:
+            txt = page.extract_text()
+            if not txt or len(txt) < 50:
+                is_ocr = True
+                try: txt = ocr_pagina(page, pdf_bytes)
+                except: pass
+
+            # O título da movimentação pode estar abaixo da faixa do cabeçalho
+            if txt and _e_movimentacao(txt): secao = SECAO_MOVIMENTACAO
+
+        mapa['secoes'][pagina] = secao
+        if secao == SECAO_MOVIMENTACAO:
+            # Começou a movimentação depois do resumo de saldos: o restante do relatório não tem saldos
+            if resumo_lido and PARAR_APOS_RESUMO:
+                mapa['ultima'] = pagina - 1
+                break
+            continue
+
+        if not txt: continue
+        linhas = _extrair_linhas(txt, is_ocr, pagina)
+        resumo_lido = resumo_lido or bool(linhas)
+        dados_pdf.extend(linhas)
+    return dados_pdf
@@ -0,0 +1,62 @@
+import pandas as pd
+from nucleo.matriz import get_chave_vinculo
+from nucleo.valores import para_centavos
+
+# ==========================================
+# LEITURA DA PLANILHA SIAFI
+# ==========================================
+CONTAS_IGNORADAS = ['123110703', '123110402', '123119910', '123110801']
+CONTA_ESTOQUE_INTERNO = '123110801'
+
+
+def extract_excel_data(df_raw):
+    extracted_data = []
+    for idx, row in df_raw.iterrows():
+        if row.isna().all(): continue
+        val_0 = str(row.iloc[0]).strip().replace('.0', '')
+
+        if val_0.startswith('123'):
+            codigo = val_0
+            desc = "SEM DESCRIÇÃO"
+            val = 0
+            cols = [c for c in row.iloc[1:] if pd.notna(c) and str(c).strip() != '']
+
+            if len(cols) >= 2:
+                desc = str(cols[0]).strip().upper()
+                val = para_centavos(cols[1])
+            elif len(cols) == 1:
+                parsed_val = para_centavos(cols[0])
+                if parsed_val != 0 or str(cols[0]).strip() in ['0', '0.0']:
+                    val = parsed_val
+                else:
+                    desc = str(cols[0]).strip().upper()
+
+            extracted_data.append({'Conta': codigo, 'Descricao': desc, 'Valor': val})
+    df = pd.DataFrame(extracted_data)
+    if not df.empty: df['Valor'] = df['Valor'].astype('int64')
+    return df
+
+def ler_siafi_ug(xls_file, sheet_name, dict_matriz):
+    """
+    Devolve o saldo da conta de Estoque Interno e as linhas extraídas da aba, com a
+    Chave_Vinculo de cada conta. O agrupamento por chave é feito no cruzamento, para todas as UGs de uma vez.
+    """
+    saldo_estoque = 0
+
+    df_raw = pd.read_excel(xls_file, sheet_name=sheet_name, header=None)
+    linhas_siafi = extract_excel_data(df_raw)
+
+    if not linhas_siafi.empty:
+        linhas_siafi['Chave_Vinculo'] = linhas_siafi['Conta'].apply(lambda c: get_chave_vinculo(c, dict_matriz))
+
+        # Extrai saldo de Estoque Interno para informação adicional
+        if CONTA_ESTOQUE_INTERNO in linhas_siafi['Conta'].values:
+            saldo_estoque = int(linhas_siafi[linhas_siafi['Conta'] == CONTA_ESTOQUE_INTERNO]['Valor'].sum())
+    return saldo_estoque, linhas_siafi
+
+def linhas_conciliaveis(linhas_siafi):
+    """Linhas que participam do cruzamento: sem as contas ignoradas e com Chave_Vinculo na MATRIZ."""
+    df_dados = linhas_siafi[~linhas_siafi['Conta'].isin(CONTAS_IGNORADAS)]
+    df_valid = df_dados.dropna(subset=['Chave_Vinculo']).copy()
+    df_valid['Chave_Vinculo'] = df_valid['Chave_Vinculo'].astype('int64')
+    return df_valid
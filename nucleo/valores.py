@@ -0,0 +1,62 @@
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+import pandas as pd
+
+# ==========================================
+# VALORES MONETÁRIOS
+# ==========================================
+# Na extração e no cruzamento os saldos trafegam como int64 em centavos: somas, diferenças
+# e a tolerância são exatas e não dependem da ordem de soma. A conversão para reais
+# acontece só nas bordas (tela, relatório PDF e histórico).
+
+# Diferenças de até R$ 0,05 são consideradas arredondamento
+TOLERANCIA_CENTAVOS = 5
+
+COLUNAS_MONETARIAS = ['Valor', 'Saldo_PDF', 'Saldo_Excel', 'Diferenca']
+
+_DECIMAL_BR = re.compile(r',(\d{1,2})$')
+_DECIMAL_US = re.compile(r'\.(\d{1,2})$')
+
+
+def _centavos_de_partes(inteiro, fracao):
+    """Monta o valor em centavos a partir da parte inteira (com sinal e lixo) e da fração já separadas."""
+    negativo = '-' in inteiro
+    digitos = re.sub(r'\D', '', inteiro)
+    centavos = int(digitos or 0) * 100 + int(fracao.ljust(2, '0'))
+    return -centavos if negativo else centavos
+
+def para_centavos(v):
+    """
+    Converte um saldo da planilha ou do PDF em centavos (int), aceitando '1.234,56' e '1,234.56'.
+    Textos são lidos dígito a dígito, sem passar por float. Valores ilegíveis viram 0.
+    """
+    if v is None or pd.isna(v): return 0
+    if isinstance(v, bool): return int(v) * 100
+    if isinstance(v, int): return v * 100
+    if isinstance(v, float): return int(round(v * 100))
+
+    v = str(v).replace('"', '').replace("'", "").strip()
+    if v == '': return 0
+    match = _DECIMAL_BR.search(v)
+    if match: return _centavos_de_partes(v[:match.start()], match.group(1))
+    match = _DECIMAL_US.search(v)
+    if match: return _centavos_de_partes(v[:match.start()], match.group(1))
+
+    # Sem separador decimal reconhecível: mesma limpeza de antes, em aritmética decimal
+    try:
+        valor = Decimal(re.sub(r'[^\d.-]', '', v))
+        return int((valor * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
+    except (InvalidOperation, ValueError):
+        return 0
+
+def formatar_centavos(centavos):
+    """Formata centavos no padrão brasileiro (1.234,56) sem passar por float."""
+    centavos = int(centavos)
+    sinal = '-' if centavos < 0 else ''
+    inteiro, fracao = divmod(abs(centavos), 100)
+    return f"{sinal}{inteiro:,}".replace(',', '.') + f",{fracao:02d}"
+
+def em_reais(df, colunas=COLUNAS_MONETARIAS):
+    """Cópia do DataFrame com as colunas monetárias presentes convertidas de centavos para reais."""
+    presentes = [c for c in colunas if c in df.columns]
+    return df.assign(**{c: df[c].astype('float64') / 100 for c in presentes})
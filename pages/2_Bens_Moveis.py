@@ -0,0 +1,81 @@
+import streamlit as st
+import os
+from nucleo.interface import id_sessao, oferecer_perfil, opcao_perfil
+from nucleo.matriz import CAMINHO_MATRIZ
+from nucleo.perfil import CapturaPerfil
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(page_title="Processador de Bens Móveis", layout="wide")
+
+st.title("📂 Processador de Planilha de Bens Móveis")
+st.markdown("""
+**Funcionalidades:**
+1. **Processar:** Aplica PROCV (usando MATRIZ.xlsx local), filtros e cores.
+2. **Download Unificado:** Baixa tudo em um único arquivo Excel.
+3. **Download Separado (.zip):** Baixa cada aba como um arquivo Excel individual.
+""")
+
+# --- BARRA LATERAL (UPLOADS) ---
+st.sidebar.header("Carregar Arquivos")
+uploaded_file = st.sidebar.file_uploader("Carregar Planilha Principal (.xlsx)", type=["xlsx"])
+with st.sidebar:
+    # Esta tela sempre processa na própria sessão, mesmo com a fila de jobs ativa
+    perfilar = opcao_perfil(pela_fila=False)
+
+# --- PROCESSAMENTO PRINCIPAL ---
+if st.sidebar.button("Processar Planilhas"):
+    # Verifica MATRIZ local
+    if not os.path.exists(CAMINHO_MATRIZ):
+        st.error("❌ O arquivo 'MATRIZ.xlsx' não foi encontrado no sistema.")
+    elif uploaded_file is None:
+        st.error("⚠️ Por favor, faça o upload da Planilha Principal.")
+    else:
+        # Só a sessão é perfilada: com muitos dados, o trabalho dos processos do pool não aparece no perfil
+        captura = CapturaPerfil(ativa=perfilar, nome="perfil_bens_moveis")
+        try:
+            with captura:
+                # pandas/xlsxwriter só são carregados quando o processamento é pedido
+                from nucleo.bens_moveis import gerar_planilha_unificada, gerar_zip_abas, processar_planilha
+                from nucleo.matriz import carregar_descricoes
+                from nucleo.governador import execucao
+
+                # 1. PREPARAÇÃO DOS DADOS (Lê direto do arquivo local)
+                # O processamento ocupa uma vaga de execução do servidor, como uma conciliação
+                with st.spinner("Aguardando vaga no servidor e processando as abas..."):
+                    with execucao(id_sessao()):
+                        df_matriz, indice_descricoes = carregar_descricoes()
+                        processed_sheets = processar_planilha(uploaded_file, indice_descricoes)
+
+                st.success(f"✅ Processamento concluído! {len(processed_sheets)} abas foram tratadas.")
+                st.markdown("---")
+
+                # --- GERAÇÃO 1: ARQUIVO ÚNICO ---
+                output_combined = gerar_planilha_unificada(df_matriz, processed_sheets)
+
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.subheader("Opção 1: Arquivo Único")
+                    st.download_button(
+                        label="📥 Baixar Planilha Completa (.xlsx)",
+                        data=output_combined,
+                        file_name="Bens_Moveis_Completa.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+
+                # --- GERAÇÃO 2: ARQUIVOS SEPARADOS (ZIP) ---
+                zip_buffer = gerar_zip_abas(processed_sheets)
+
+                with col2:
+                    st.subheader("Opção 2: Abas Separadas")
+                    st.download_button(
+                        label="📦 Baixar Arquivos Separados (.zip)",
+                        data=zip_buffer,
+                        file_name="Abas_Separadas.zip",
+                        mime="application/zip"
+                    )
+
+            oferecer_perfil(captura)
+
+        except Exception as e:
+            st.error(f"❌ Ocorreu um erro: {e}")
@@ -0,0 +1,52 @@
+import streamlit as st
+import os
+from nucleo.interface import acompanhar_job, campo_periodo, iniciar_conciliacao, opcao_perfil, validar_periodo
+from nucleo.matriz import CAMINHO_MATRIZ
+
+# ==========================================
+# CONFIGURAÇÃO INICIAL
+# ==========================================
+st.set_page_config(
+    page_title="Conciliador RMB x SIAFI (Definitivo)",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# ==========================================
+# INTERFACE
+# ==========================================
+# Mesma conciliação da página principal (nucleo/conciliacao.py), com envio separado
+# da planilha e dos PDFs.
+st.title("📊 Conciliador RMB x SIAFI (Motor Unificado)")
+st.markdown("""
+**Funcionamento Inteligente:** Faça o upload da Planilha Principal RAW (várias abas) e os PDFs. O motor traduz internamente as chaves através da MATRIZ lendo os valores exatamente como a ferramenta separada faria.
+""")
+st.markdown("---")
+
+col_upload1, col_upload2 = st.columns(2)
+with col_upload1:
+    uploaded_siafi = st.file_uploader("1. Planilha Principal SIAFI Bruta (.xlsx)", type=["xlsx"])
+with col_upload2:
+    uploaded_pdfs = st.file_uploader("2. Relatórios RMB (.pdf)", accept_multiple_files=True, type=['pdf'])
+
+periodo = campo_periodo()
+perfilar = opcao_perfil()
+
+st.markdown("---")
+
+# ==========================================
+# PROCESSAMENTO PRINCIPAL
+# ==========================================
+if st.button("🚀 Iniciar Auditoria Unificada", type="primary", use_container_width=True):
+    if not os.path.exists(CAMINHO_MATRIZ):
+        st.error("❌ O arquivo 'MATRIZ.xlsx' não foi encontrado na pasta do sistema.")
+    elif uploaded_siafi is None:
+        st.warning("⚠️ Por favor, carregue a Planilha Principal SIAFI.")
+    elif not uploaded_pdfs:
+        st.warning("⚠️ Faltam os relatórios RMB (.pdf).")
+    else:
+        iniciar_conciliacao(uploaded_siafi, uploaded_pdfs, validar_periodo(periodo), perfilar=perfilar)
+
+elif "job" in st.query_params:
+    acompanhar_job(st.query_params["job"])
@@ -0,0 +1,52 @@
+import streamlit as st
+from nucleo import historico
+from nucleo.valores import em_reais
+
+# ==========================================
+# HISTÓRICO DAS CONCILIAÇÕES
+# ==========================================
+st.title("📈 Histórico das Conciliações")
+st.markdown("""
+Acompanhe a evolução das diferenças entre RMB e SIAFI ao longo dos meses.
+Cada conciliação gerada com um **mês de referência** é registrada automaticamente;
+reprocessar o mesmo mês substitui o registro anterior da Unidade Gestora.
+""")
+
+periodos_disponiveis = historico.listar_periodos()
+if not periodos_disponiveis:
+    st.info("ℹ️ Ainda não há conciliações registradas no histórico.")
+    st.stop()
+
+col_filtro1, col_filtro2 = st.columns(2)
+with col_filtro1:
+    periodos = st.multiselect("Meses de referência", periodos_disponiveis, default=periodos_disponiveis[-12:])
+with col_filtro2:
+    ugs_texto = st.text_input("Unidades Gestoras (separadas por vírgula, vazio = todas)")
+ugs = [u.strip() for u in ugs_texto.split(',') if u.strip()]
+
+st.markdown("---")
+
+# --- TENDÊNCIA POR UG ---
+st.subheader("Evolução da diferença por Unidade Gestora")
+# O histórico guarda centavos; a tela mostra reais
+tendencia = em_reais(historico.tendencia_divergencias(periodos=periodos, ugs=ugs))
+if tendencia.empty:
+    st.info("Nenhum registro para os filtros selecionados.")
+else:
+    grafico = tendencia.pivot(index='periodo', columns='ug', values='Diferenca')
+    st.line_chart(grafico)
+    with st.expander("Visualizar Totais por Mês"):
+        st.dataframe(tendencia, use_container_width=True)
+
+# --- DIVERGÊNCIAS RECORRENTES ---
+st.subheader("Divergências recorrentes")
+minimo = st.number_input("Divergente em pelo menos quantos meses?", min_value=1, value=2, step=1)
+recorrentes = em_reais(
+    historico.divergencias_recorrentes(periodos=periodos, ugs=ugs, minimo_periodos=minimo),
+    colunas=['Diferenca_Ultima'],
+)
+if recorrentes.empty:
+    st.success("✅ Nenhuma conta divergente de forma recorrente nos meses selecionados.")
+else:
+    st.warning(f"Atenção: {len(recorrentes)} conta(s) divergentes em {minimo} ou mais meses.")
+    st.dataframe(recorrentes, use_container_width=True)
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from nucleo.conciliacao import cruzar_lote
+from nucleo.valores import TOLERANCIA_CENTAVOS
+
+
+def _siafi(linhas):
+    """Linhas SIAFI já extraídas: (Conta, Chave_Vinculo, Valor em centavos)."""
+    return pd.DataFrame(
+        [(conta, f"DESCRIÇÃO {chave}", valor, chave) for conta, chave, valor in linhas],
+        columns=['Conta', 'Descricao', 'Valor', 'Chave_Vinculo'],
+    )
+
+def _rmb(linhas):
+    """Linhas RMB já extraídas: (Chave_Vinculo, Saldo_PDF em centavos)."""
+    return pd.DataFrame([(1, chave, saldo) for chave, saldo in linhas], columns=['Pagina', 'Chave_Vinculo', 'Saldo_PDF'])
+
+def _extracao(ug, siafi, rmb):
+    return {'ug': ug, 'linhas_siafi': _siafi(siafi), 'linhas_rmb': _rmb(rmb)}
+
+
+def test_abas_com_a_mesma_ug_sao_cruzadas_separadamente():
+    extracoes = [
+        _extracao('153030', [('123110101', 1, 1000)], [(1, 1000)]),
+        _extracao('153030', [('123110101', 1, 5000)], [(1, 2000)]),
+    ]
+    primeira, segunda = cruzar_lote(extracoes)
+
+    assert primeira['final']['Saldo_Excel'].tolist() == [1000]
+    assert primeira['divergencias'].empty
+    assert (segunda['soma_pdf'], segunda['soma_excel'], segunda['dif_total']) == (2000, 5000, -3000)
+    assert segunda['divergencias']['Diferenca'].tolist() == [-3000]
+
+def test_lado_vazio_vira_saldo_zero():
+    so_siafi, so_rmb = cruzar_lote([
+        _extracao('153030', [('123110101', 1, 1000)], []),
+        _extracao('153031', [], [(2, 700)]),
+    ])
+
+    assert so_siafi['final'][['Saldo_PDF', 'Saldo_Excel', 'Diferenca']].values.tolist() == [[0, 1000, -1000]]
+    assert so_rmb['final'][['Saldo_PDF', 'Saldo_Excel', 'Diferenca']].values.tolist() == [[700, 0, 700]]
+    assert so_rmb['final']['Descricao'].tolist() == ["ITEM SEM DESCRIÇÃO NO SIAFI"]
+    assert so_rmb['final']['Saldo_PDF'].dtype == 'int64'
+
+def test_diferenca_no_limite_da_tolerancia():
+    (resultado,) = cruzar_lote([_extracao(
+        '153030',
+        [('123110101', 1, 10000), ('123110102', 2, 10000)],
+        [(1, 10000 + TOLERANCIA_CENTAVOS), (2, 10000 + TOLERANCIA_CENTAVOS + 1)],
+    )])
+
+    assert resultado['final']['Diferenca'].tolist() == [TOLERANCIA_CENTAVOS, TOLERANCIA_CENTAVOS + 1]
+    assert resultado['divergencias']['Chave_Vinculo'].tolist() == [2]
+
+def test_resultados_seguem_a_ordem_das_extracoes():
+    resultados = cruzar_lote([
+        _extracao('153031', [('123110101', 1, 100)], [(1, 100)]),
+        _extracao('153030', [('123110101', 1, 200)], [(1, 200)]),
+    ])
+    assert [(r['ug'], r['soma_pdf']) for r in resultados] == [('153031', 100), ('153030', 200)]
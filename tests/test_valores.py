@@ -0,0 +1,57 @@
+import re
+
+import pandas as pd
+import pytest
+
+from nucleo.valores import formatar_centavos, para_centavos
+
+
+def limpar_valor(v):
+    """Conversão para reais (float) usada antes dos centavos; referência de comportamento."""
+    if v is None or pd.isna(v) or str(v).strip() == '': return 0.0
+    if isinstance(v, (int, float)): return float(v)
+    v = str(v).replace('"', '').replace("'", "").strip()
+    if re.search(r',\d{1,2}$', v): v = v.replace('.', '').replace(',', '.')
+    elif re.search(r'\.\d{1,2}$', v): v = v.replace(',', '')
+    try: return float(re.sub(r'[^\d.-]', '', v))
+    except: return 0.0
+
+
+@pytest.mark.parametrize('entrada', [
+    # Padrão brasileiro
+    '1.234,56', '1.234.567,8', '0,01', '12,5', 'R$ 1.234,56', '"9.999,99"',
+    # Padrão americano
+    '1,234.56', '1,234,567.8', '0.05', '1234.5',
+    # Negativos
+    '-1.234,56', '-0,01', '-1,234.56', '-12',
+    # Vazios e ilegíveis
+    '', '   ', None, float('nan'), 'abc',
+    # Números já convertidos pela planilha
+    0, 1234, -7, 1234.56, 0.1, -0.29,
+])
+def test_para_centavos_equivale_a_limpar_valor(entrada):
+    assert para_centavos(entrada) == round(limpar_valor(entrada) * 100)
+
+
+@pytest.mark.parametrize('entrada, esperado', [
+    ('1.234,56', 123456),
+    ('1,234.56', 123456),
+    ('-0,01', -1),
+    ('', 0),
+    (None, 0),
+])
+def test_para_centavos_valores_exatos(entrada, esperado):
+    assert para_centavos(entrada) == esperado
+
+
+def test_para_centavos_sem_erro_de_ponto_flutuante():
+    # Em float, 0,1 + 0,2 não fecha em 0,3; em centavos a soma é exata
+    assert 0.1 + 0.2 != 0.3
+    assert para_centavos('0,10') + para_centavos('0,20') == para_centavos('0,30')
+
+
+@pytest.mark.parametrize('centavos, texto', [
+    (0, '0,00'), (5, '0,05'), (123456, '1.234,56'), (-123456789, '-1.234.567,89'),
+])
+def test_formatar_centavos(centavos, texto):
+    assert formatar_centavos(centavos) == texto
@@ -0,0 +1,110 @@
+"""
+Worker da fila de conciliação.
+
+Uso:
+    python worker.py --processos 4
+
+Cada processo retira um job pendente da fila (nucleo/jobs.py), executa o mesmo pipeline
+da tela de conciliação e grava o resultado e o relatório PDF na pasta do job.
+O número de processos define quantas conciliações rodam em paralelo no servidor.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+
+from nucleo import jobs
+from nucleo.conciliacao import executar_conciliacao
+from nucleo.erros import ErroConciliacao
+
+INTERVALO_HEARTBEAT = 15
+TEMPO_LIMITE_ORFAO = 120
+INTERVALO_SUPERVISAO = 5
+
+
+def executar_job(job, caminho_matriz):
+    planilha, caminhos_pdf = jobs.caminhos_entrada(job)
+
+    # Mantém o heartbeat vivo mesmo durante páginas longas de OCR
+    parar = threading.Event()
+    def heartbeat():
+        while not parar.wait(INTERVALO_HEARTBEAT):
+            # Uma falha pontual do banco (ex.: "database is locked") não pode encerrar o heartbeat
+            try: jobs.atualizar_progresso(job['id'])
+            except Exception: traceback.print_exc()
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    arquivos_pdf = []
+    try:
+        for caminho in caminhos_pdf: arquivos_pdf.append(open(caminho, 'rb'))
+        pdfs = {os.path.basename(f.name): f for f in arquivos_pdf}
+        saida = executar_conciliacao(
+            planilha, pdfs, caminho_matriz,
+            ao_progredir=lambda fracao, mensagem: jobs.atualizar_progresso(job['id'], fracao, mensagem),
+            periodo=job['periodo']
+        )
+        jobs.concluir_job(job['id'], saida)
+    except ErroConciliacao as e:
+        jobs.falhar_job(job['id'], str(e))
+    except Exception:
+        traceback.print_exc()
+        jobs.falhar_job(job['id'], "❌ Ocorreu um erro inesperado durante a conciliação. Contate o suporte técnico.")
+    finally:
+        parar.set()
+        for f in arquivos_pdf: f.close()
+
+def loop_worker(indice, caminho_matriz, intervalo):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{indice}"
+    print(f"[{worker_id}] aguardando jobs...", flush=True)
+    while True:
+        # Erros do banco (ex.: "database is locked") ou de um job não podem derrubar o processo:
+        # registra, espera e tenta de novo. Um job que ficar sem heartbeat volta para a fila.
+        try:
+            jobs.recuperar_jobs_orfaos(TEMPO_LIMITE_ORFAO)
+            job = jobs.reivindicar_proximo_job(worker_id)
+            if job is None:
+                time.sleep(intervalo)
+                continue
+            print(f"[{worker_id}] executando job {job['id']} (tentativa {job['tentativas']})", flush=True)
+            executar_job(job, caminho_matriz)
+        except Exception:
+            traceback.print_exc()
+            time.sleep(intervalo)
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker da fila de conciliação RMB x SIAFI")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="quantidade de processos paralelos")
+    parser.add_argument("--matriz", default="MATRIZ.xlsx", help="caminho da MATRIZ.xlsx")
+    parser.add_argument("--intervalo", type=float, default=2.0, help="segundos entre consultas à fila vazia")
+    parser.add_argument("--reter-dias", type=int, default=7, help="dias até remover jobs finalizados")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.matriz):
+        raise SystemExit(f"O arquivo de configuração '{args.matriz}' não foi encontrado.")
+
+    jobs.limpar_jobs_antigos(args.reter_dias)
+
+    def iniciar(indice):
+        p = multiprocessing.Process(target=loop_worker, args=(indice, args.matriz, args.intervalo), daemon=True)
+        p.start()
+        return p
+
+    processos = [iniciar(indice) for indice in range(args.processos)]
+
+    # Um processo que morrer (ex.: arquivo que derruba o leitor de PDF) é substituído;
+    # o job que ele executava volta para a fila pelo heartbeat, até MAXIMO_TENTATIVAS
+    try:
+        while True:
+            for indice, p in enumerate(processos):
+                if not p.is_alive():
+                    print(f"[worker {indice}] processo encerrado (código {p.exitcode}); reiniciando...", flush=True)
+                    processos[indice] = iniciar(indice)
+            time.sleep(INTERVALO_SUPERVISAO)
+    except KeyboardInterrupt:
+        for p in processos: p.terminate()
+
+if __name__ == "__main__":
+    main()